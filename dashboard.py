@@ -8,11 +8,10 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from wordcloud import WordCloud
-import matplotlib.pyplot as plt
 import sys
+import time
 from pathlib import Path
 from datetime import datetime
-import sqlite3
 
 # Add src to path
 project_root = Path(__file__).parent
@@ -26,8 +25,19 @@ try:
         get_posts_by_platform, 
         get_posts_by_sentiment,
         get_sentiment_statistics,
-        DATABASE_FILE
+        get_connection,
+        create_database,
+        search_posts,
+        get_sentiment_timeline,
+        count_posts,
+        get_sentiment_breakdown,
+        get_engagement_averages,
+        get_filtered_posts,
+        get_term_frequencies,
+        get_term_frequency_version,
+        FILTERED_POST_COLUMNS
     )
+    from src.job_runner import JobRunner
 except ImportError:
     # Fallback for direct imports
     from database import (
@@ -35,8 +45,19 @@ except ImportError:
         get_posts_by_platform, 
         get_posts_by_sentiment,
         get_sentiment_statistics,
-        DATABASE_FILE
+        get_connection,
+        create_database,
+        search_posts,
+        get_sentiment_timeline,
+        count_posts,
+        get_sentiment_breakdown,
+        get_engagement_averages,
+        get_filtered_posts,
+        get_term_frequencies,
+        get_term_frequency_version,
+        FILTERED_POST_COLUMNS
     )
+    from job_runner import JobRunner
 
 
 # Page configuration
@@ -86,67 +107,98 @@ subreddit = st.sidebar.text_input(
 scrape_limit = st.sidebar.slider("Number of posts to scrape:", 10, 100, 25)
 scrape_btn = st.sidebar.button("🚀 Scrape & Analyze", help="Scrape latest posts and analyze sentiment.", type="primary")
 
+
+@st.cache_resource
+def get_job_runner():
+    """Background scrape-and-analyze runner shared by all sessions of this server"""
+    runner = JobRunner()
+    # Build the scraper and VADER analyzer now, so the first click is fast
+    runner.warm_up('vader')
+    return runner
+
+
 if scrape_btn and subreddit:
-    progress_bar = st.sidebar.progress(0)
-    status_text = st.sidebar.empty()
-    
-    try:
-        import subprocess
-        
-        # Step 1: Scrape
-        status_text.text(f"Scraping r/{subreddit}...")
-        progress_bar.progress(33)
-        result1 = subprocess.run([
-            sys.executable, "-c",
-            f"from src.social_scraper import SocialMediaScraper; SocialMediaScraper().scrape_reddit_posts('{subreddit}', limit={scrape_limit})"
-        ], capture_output=True, text=True)
-        
-        if result1.returncode != 0:
-            st.sidebar.error(f"Scraping failed: {result1.stderr}")
+    job = get_job_runner().submit(subreddit, limit=scrape_limit, method='vader')
+    st.session_state['scrape_job_id'] = job.id
+
+# Live progress of this session's job (the page reruns until it finishes)
+scrape_job_id = st.session_state.get('scrape_job_id')
+scrape_job = get_job_runner().get(scrape_job_id) if scrape_job_id else None
+if scrape_job is not None:
+    st.sidebar.progress(scrape_job.progress, text=scrape_job.message)
+    if scrape_job.done:
+        del st.session_state['scrape_job_id']
+        if scrape_job.status == 'done':
+            st.sidebar.success(f"✅ {scrape_job.message}")
+            st.cache_data.clear()
         else:
-            # Step 2: Analyze
-            status_text.text("Analyzing sentiment...")
-            progress_bar.progress(66)
-            result2 = subprocess.run([
-                sys.executable, str(project_root / "scripts" / "analyze_sentiment.py"), 
-                "--method", "vader"
-            ], capture_output=True, text=True)
-            
-            if result2.returncode != 0:
-                st.sidebar.error(f"Analysis failed: {result2.stderr}")
-            else:
-                progress_bar.progress(100)
-                status_text.text("✅ Complete!")
-                st.sidebar.success(f"Scraped {scrape_limit} posts from r/{subreddit}!")
-                st.cache_data.clear()
-                st.rerun()
-    except Exception as e:
-        st.sidebar.error(f"Error: {str(e)}")
+            st.sidebar.error(f"Scraping failed: {scrape_job.error}")
+elif scrape_job_id:
+    # The runner was rebuilt (e.g. server restart) and no longer knows the job
+    del st.session_state['scrape_job_id']
+
+
+@st.cache_resource
+def ensure_schema():
+    """Create or upgrade the database schema once per server process"""
+    create_database()
+
+
+ensure_schema()
+
+
+# Rows shown per page of the raw data table
+PAGE_SIZE = 50
+
+# Words drawn in each word cloud
+WORDCLOUD_MAX_WORDS = 100
+
+
+@st.cache_data(ttl=60)
+def load_breakdown(platform=None, sentiment=None):
+    """Load analyzed post counts per platform and sentiment label"""
+    return pd.DataFrame(
+        get_sentiment_breakdown(platform, sentiment),
+        columns=['platform', 'sentiment_label', 'count', 'score_sum']
+    )
+
+
+@st.cache_data(ttl=60)
+def load_engagement(platform=None, sentiment=None):
+    """Load average likes, comments and shares"""
+    return get_engagement_averages(platform, sentiment)
 
 
 @st.cache_data(ttl=60)
-def load_posts_data():
-    """Load posts data from database"""
+def load_posts_page(platform=None, sentiment=None, order_by='scraped_at', limit=PAGE_SIZE, offset=0):
+    """Load one page of analyzed posts (only the rows that are displayed)"""
     try:
-        conn = sqlite3.connect(DATABASE_FILE)
-        query = """
-            SELECT id, platform, username, content, url, likes, shares, comments,
-                   post_date, scraped_at, sentiment_score, sentiment_label, analyzed_at
-            FROM posts
-            WHERE sentiment_label IS NOT NULL
-            ORDER BY scraped_at DESC
-        """
-        df = pd.read_sql_query(query, conn)
-        conn.close()
-        return df
+        return pd.DataFrame(
+            get_filtered_posts(platform, sentiment, order_by=order_by, limit=limit, offset=offset),
+            columns=FILTERED_POST_COLUMNS
+        )
     except Exception as e:
         st.error(f"Error loading data: {e}")
-        return pd.DataFrame()
+        return pd.DataFrame(columns=FILTERED_POST_COLUMNS)
+
+
+@st.cache_data(ttl=60)
+def load_database_overview():
+    """Load the sidebar overview: subreddits, total and analyzed post counts"""
+    cursor = get_connection().cursor()
+    # Extract the subreddit from URLs like https://reddit.com/r/<name>/comments/...
+    cursor.execute("""
+        SELECT DISTINCT substr(rest, 1, instr(rest, '/') - 1)
+        FROM (SELECT substr(url, instr(url, '/r/') + 3) AS rest
+              FROM posts WHERE platform = 'reddit' AND url LIKE '%reddit.com/r/%')
+    """)
+    subreddits = sorted(row[0] for row in cursor.fetchall() if row[0])
+    return subreddits, count_posts(), get_sentiment_statistics()[0]
 
 
-def create_sentiment_distribution_chart(df):
+def create_sentiment_distribution_chart(breakdown):
     """Create pie chart for sentiment distribution"""
-    sentiment_counts = df['sentiment_label'].value_counts()
+    sentiment_counts = breakdown.groupby('sentiment_label')['count'].sum()
     
     colors = {
         'positive': '#2ecc71',
@@ -169,9 +221,9 @@ def create_sentiment_distribution_chart(df):
     return fig
 
 
-def create_platform_sentiment_chart(df):
+def create_platform_sentiment_chart(breakdown):
     """Create grouped bar chart for sentiment by platform"""
-    platform_sentiment = df.groupby(['platform', 'sentiment_label']).size().reset_index(name='count')
+    platform_sentiment = breakdown[['platform', 'sentiment_label', 'count']]
     
     fig = px.bar(
         platform_sentiment,
@@ -191,14 +243,21 @@ def create_platform_sentiment_chart(df):
     return fig
 
 
-def create_sentiment_timeline(df):
+@st.cache_data(ttl=60)
+def load_timeline_data(granularity, platform=None, sentiment=None):
+    """Load per-bucket sentiment counts from the rollup tables"""
+    timeline = get_sentiment_timeline(granularity=granularity, platform=platform, sentiment=sentiment)
+    return pd.DataFrame(timeline, columns=['bucket', 'sentiment_label', 'count', 'avg_score', 'score_stddev'])
+
+
+def create_sentiment_timeline(granularity='day', platform=None, sentiment=None):
     """Create timeline chart showing sentiment over time"""
-    df['scraped_date'] = pd.to_datetime(df['scraped_at']).dt.date
-    timeline = df.groupby(['scraped_date', 'sentiment_label']).size().reset_index(name='count')
+    timeline = load_timeline_data(granularity, platform, sentiment)
+    timeline['bucket'] = pd.to_datetime(timeline['bucket'])
     
     fig = px.line(
         timeline,
-        x='scraped_date',
+        x='bucket',
         y='count',
         color='sentiment_label',
         color_discrete_map={
@@ -209,18 +268,22 @@ def create_sentiment_timeline(df):
         title="Sentiment Trends Over Time"
     )
     
-    fig.update_layout(height=400)
+    fig.update_layout(height=400, xaxis_title='scraped_date' if granularity == 'day' else 'scraped_hour')
     return fig
 
 
-def create_wordcloud(df, sentiment=None):
-    """Create word cloud from post content"""
-    if sentiment:
-        texts = ' '.join(df[df['sentiment_label'] == sentiment]['content'].astype(str))
-    else:
-        texts = ' '.join(df['content'].astype(str))
-    
-    if not texts.strip():
+@st.cache_data(max_entries=64)
+def render_wordcloud(platform, sentiment, version):
+    """
+    Render a word cloud image (RGB array) from the stored word counts
+    
+    Cached per filter and term_frequencies version, so a cloud is only
+    redrawn after newly analyzed posts changed its counts. Plain arrays are
+    cached rather than matplotlib figures, which pyplot would keep alive
+    after the cache evicted them.
+    """
+    frequencies = get_term_frequencies(platform, sentiment, limit=WORDCLOUD_MAX_WORDS)
+    if not frequencies:
         return None
     
     wordcloud = WordCloud(
@@ -228,13 +291,14 @@ def create_wordcloud(df, sentiment=None):
         height=400,
         background_color='white',
         colormap='viridis',
-        max_words=100
-    ).generate(texts)
-    
-    fig, ax = plt.subplots(figsize=(10, 5))
-    ax.imshow(wordcloud, interpolation='bilinear')
-    ax.axis('off')
-    return fig
+        max_words=WORDCLOUD_MAX_WORDS
+    ).generate_from_frequencies(frequencies)
+    return wordcloud.to_array()
+
+
+def create_wordcloud(platform=None, sentiment=None):
+    """Create word cloud from post content"""
+    return render_wordcloud(platform, sentiment, get_term_frequency_version())
 
 
 def main():
@@ -242,10 +306,10 @@ def main():
     st.title("📊 Social Media Sentiment Analysis Dashboard")
     st.markdown("---")
     
-    # Load data
-    df = load_posts_data()
+    # Load the per-platform/label counts (a few rows, whatever the table size)
+    overall = load_breakdown()
     
-    if df.empty:
+    if overall.empty:
         st.warning("⚠️ No analyzed posts found in the database.")
         st.info("**Use the sidebar** to scrape a topic (e.g., 'technology', 'geopolitics') and analyze sentiment!")
         return
@@ -254,32 +318,14 @@ def main():
     st.sidebar.markdown("---")
     st.sidebar.header("📊 Database Stats")
     
-    # Get unique topics from content
     try:
-        conn = sqlite3.connect(DATABASE_FILE)
-        cursor = conn.cursor()
-        cursor.execute("SELECT DISTINCT url FROM posts WHERE url LIKE '%reddit.com/r/%'")
-        urls = [row[0] for row in cursor.fetchall() if row[0]]
-        
-        # Extract subreddit names
-        subreddits = set()
-        for url in urls:
-            if '/r/' in url:
-                subreddit = url.split('/r/')[1].split('/')[0]
-                subreddits.add(subreddit)
+        subreddits, total_posts, analyzed_posts = load_database_overview()
         
         if subreddits:
-            st.sidebar.markdown(f"**Topics in database:** {', '.join(sorted(subreddits)[:5])}")
+            st.sidebar.markdown(f"**Topics in database:** {', '.join(subreddits[:5])}")
         
-        cursor.execute("SELECT COUNT(*) FROM posts")
-        total_posts = cursor.fetchone()[0]
         st.sidebar.metric("Total Posts in DB", total_posts)
-        
-        cursor.execute("SELECT COUNT(*) FROM posts WHERE sentiment_label IS NOT NULL")
-        analyzed_posts = cursor.fetchone()[0]
         st.sidebar.metric("Analyzed Posts", analyzed_posts)
-        
-        conn.close()
     except Exception as e:
         pass
     
@@ -287,36 +333,36 @@ def main():
     st.sidebar.markdown("---")
     st.sidebar.header("🔍 Filters")
     
-    platforms = ['All'] + list(df['platform'].unique())
+    platforms = ['All'] + list(overall['platform'].unique())
     selected_platform = st.sidebar.selectbox("Platform", platforms)
     
-    sentiments = ['All'] + list(df['sentiment_label'].unique())
+    sentiments = ['All'] + list(overall['sentiment_label'].unique())
     selected_sentiment = st.sidebar.selectbox("Sentiment", sentiments)
     
-    # Apply filters
-    filtered_df = df.copy()
-    if selected_platform != 'All':
-        filtered_df = filtered_df[filtered_df['platform'] == selected_platform]
-    if selected_sentiment != 'All':
-        filtered_df = filtered_df[filtered_df['sentiment_label'] == selected_sentiment]
+    # Filters are applied in SQL; every query below is cached per filter state
+    platform_filter = None if selected_platform == 'All' else selected_platform
+    sentiment_filter = None if selected_sentiment == 'All' else selected_sentiment
+    breakdown = load_breakdown(platform_filter, sentiment_filter)
+    total_filtered = int(breakdown['count'].sum())
+    label_counts = breakdown.groupby('sentiment_label')['count'].sum()
     
     # Key Metrics
     st.header("📈 Key Metrics")
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Total Posts", len(filtered_df))
+        st.metric("Total Posts", total_filtered)
     
     with col2:
-        positive_pct = (filtered_df['sentiment_label'] == 'positive').sum() / len(filtered_df) * 100 if len(filtered_df) > 0 else 0
+        positive_pct = label_counts.get('positive', 0) / total_filtered * 100 if total_filtered > 0 else 0
         st.metric("Positive", f"{positive_pct:.1f}%")
     
     with col3:
-        negative_pct = (filtered_df['sentiment_label'] == 'negative').sum() / len(filtered_df) * 100 if len(filtered_df) > 0 else 0
+        negative_pct = label_counts.get('negative', 0) / total_filtered * 100 if total_filtered > 0 else 0
         st.metric("Negative", f"{negative_pct:.1f}%")
     
     with col4:
-        avg_score = filtered_df['sentiment_score'].mean() if len(filtered_df) > 0 else 0
+        avg_score = breakdown['score_sum'].sum() / total_filtered if total_filtered > 0 else 0
         st.metric("Avg Sentiment Score", f"{avg_score:.3f}")
     
     st.markdown("---")
@@ -325,17 +371,15 @@ def main():
     col1, col2 = st.columns(2)
     
     with col1:
-        st.plotly_chart(create_sentiment_distribution_chart(filtered_df), use_container_width=True)
+        st.plotly_chart(create_sentiment_distribution_chart(breakdown), use_container_width=True)
     
     with col2:
         if selected_platform == 'All':
-            st.plotly_chart(create_platform_sentiment_chart(filtered_df), use_container_width=True)
+            st.plotly_chart(create_platform_sentiment_chart(breakdown), use_container_width=True)
         else:
             # Show engagement metrics for selected platform
             st.subheader(f"{selected_platform.title()} Engagement")
-            avg_likes = filtered_df['likes'].mean()
-            avg_comments = filtered_df['comments'].mean()
-            avg_shares = filtered_df['shares'].mean()
+            avg_likes, avg_comments, avg_shares = load_engagement(platform_filter, sentiment_filter)
             
             metrics_df = pd.DataFrame({
                 'Metric': ['Likes', 'Comments', 'Shares'],
@@ -346,7 +390,12 @@ def main():
             st.plotly_chart(fig, use_container_width=True)
     
     # Timeline
-    st.plotly_chart(create_sentiment_timeline(filtered_df), use_container_width=True)
+    granularity = st.radio("Timeline granularity", ['day', 'hour'], horizontal=True)
+    st.plotly_chart(create_sentiment_timeline(
+        granularity,
+        platform=platform_filter,
+        sentiment=sentiment_filter
+    ), use_container_width=True)
     
     # Word Clouds
     st.header("☁️ Word Clouds")
@@ -354,35 +403,24 @@ def main():
     tab1, tab2, tab3, tab4 = st.tabs(["All Posts", "Positive", "Negative", "Neutral"])
     
     with tab1:
-        fig = create_wordcloud(filtered_df)
-        if fig:
-            st.pyplot(fig)
-    
-    with tab2:
-        fig = create_wordcloud(filtered_df, 'positive')
-        if fig:
-            st.pyplot(fig)
-        else:
-            st.info("No positive posts to display")
-    
-    with tab3:
-        fig = create_wordcloud(filtered_df, 'negative')
-        if fig:
-            st.pyplot(fig)
-        else:
-            st.info("No negative posts to display")
-    
-    with tab4:
-        fig = create_wordcloud(filtered_df, 'neutral')
-        if fig:
-            st.pyplot(fig)
-        else:
-            st.info("No neutral posts to display")
+        image = create_wordcloud(platform_filter, sentiment_filter)
+        if image is not None:
+            st.image(image, use_column_width=True)
+    
+    for tab, label in ((tab2, 'positive'), (tab3, 'negative'), (tab4, 'neutral')):
+        with tab:
+            image = None
+            if sentiment_filter in (None, label):
+                image = create_wordcloud(platform_filter, label)
+            if image is not None:
+                st.image(image, use_column_width=True)
+            else:
+                st.info(f"No {label} posts to display")
     
     # Top Posts
     st.header("🔝 Top Posts by Engagement")
     
-    top_posts = filtered_df.nlargest(10, 'likes')[['platform', 'username', 'content', 'likes', 'comments', 'sentiment_label', 'sentiment_score']]
+    top_posts = load_posts_page(platform_filter, sentiment_filter, order_by='likes', limit=10)
     
     for idx, row in top_posts.iterrows():
         with st.expander(f"[{row['platform']}] @{row['username']} - {row['sentiment_label'].upper()} ({row['likes']} likes)"):
@@ -392,24 +430,63 @@ def main():
             col2.metric("Comments", row['comments'])
             col3.metric("Sentiment Score", f"{row['sentiment_score']:.3f}")
     
+    # Full-text search
+    st.header("🔎 Search Posts")
+    
+    search_query = st.text_input("Search post content", placeholder="e.g. battery life")
+    if search_query:
+        results = search_posts(
+            search_query,
+            platform=platform_filter,
+            sentiment=sentiment_filter,
+            limit=50
+        )
+        if results:
+            results_df = pd.DataFrame(results, columns=[
+                'id', 'platform', 'username', 'content', 'url', 'sentiment_score',
+                'sentiment_label', 'scraped_at', 'rank'
+            ])
+            st.caption(f"{len(results_df)} best matches")
+            st.dataframe(
+                results_df[['platform', 'username', 'content', 'sentiment_label', 'sentiment_score']],
+                use_container_width=True
+            )
+        else:
+            st.info("No posts match your search")
+    
     # Raw Data
     st.header("📋 Raw Data")
     
     if st.checkbox("Show raw data"):
+        page_count = max(1, -(-total_filtered // PAGE_SIZE))
+        page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1)
+        page_df = load_posts_page(platform_filter, sentiment_filter, offset=(page - 1) * PAGE_SIZE)
         st.dataframe(
-            filtered_df[['platform', 'username', 'content', 'sentiment_label', 'sentiment_score', 'likes', 'comments']],
+            page_df[['platform', 'username', 'content', 'sentiment_label', 'sentiment_score', 'likes', 'comments']],
             use_container_width=True
         )
         
-        # Download button
-        csv = filtered_df.to_csv(index=False)
-        st.download_button(
-            label="Download data as CSV",
-            data=csv,
-            file_name=f"sentiment_analysis_{datetime.now().strftime('%Y%m%d')}.csv",
-            mime="text/csv"
-        )
+        # The full export is only queried when asked for
+        if st.button("Prepare CSV export"):
+            export_df = pd.DataFrame(
+                get_filtered_posts(platform_filter, sentiment_filter, limit=None),
+                columns=FILTERED_POST_COLUMNS
+            )
+            st.download_button(
+                label="Download data as CSV",
+                data=export_df.to_csv(index=False),
+                file_name=f"sentiment_analysis_{datetime.now().strftime('%Y%m%d')}.csv",
+                mime="text/csv"
+            )
+
+
+def poll_scrape_job():
+    """Rerun shortly while this session's scrape job is still running"""
+    if 'scrape_job_id' in st.session_state:
+        time.sleep(0.5)
+        st.rerun()
 
 
 if __name__ == "__main__":
     main()
+    poll_scrape_job()
@@ -11,16 +11,8 @@ project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 sys.path.insert(0, str(project_root / 'src'))
 
-# Now import from src
-try:
-    from src.social_scraper import SocialMediaScraper
-    from src.sentiment_analyzer import SentimentAnalyzer
-    from src.database import get_sentiment_statistics
-except ImportError:
-    # Fallback for direct imports
-    from social_scraper import SocialMediaScraper
-    from sentiment_analyzer import SentimentAnalyzer
-    from database import get_sentiment_statistics
+# src modules are imported by the option that needs them, so e.g. viewing
+# statistics never loads the scraper's HTTP and HTML parsing libraries
 
 def main():
     """Main application entry point"""
@@ -42,6 +34,11 @@ def main():
     
     if choice == '1':
         print("\n🌐 Starting social media scraper...")
+        try:
+            from src.social_scraper import SocialMediaScraper
+        except ImportError:
+            # Fallback for direct imports
+            from social_scraper import SocialMediaScraper
         scraper = SocialMediaScraper()
         scraper.scrape_all()
         
@@ -52,6 +49,14 @@ def main():
         
     elif choice == '3':
         print("\n📊 Sentiment Statistics:")
+        try:
+            from src.database import open_read_only, get_sentiment_statistics
+        except ImportError:
+            # Fallback for direct imports
+            from database import open_read_only, get_sentiment_statistics
+        # Migrates databases created by older versions (they lack the statistics
+        # summary table); a current one is only read
+        open_read_only()
         stats = get_sentiment_statistics()
         if stats and stats[0] > 0:
             print(f"Total Posts: {stats[0]}")
@@ -16,12 +16,34 @@ sys.path.insert(0, str(project_root / 'src'))
 
 # Now import from src
 try:
-    from src.database import get_all_posts, update_post_sentiment
+    from src.database import (
+        count_posts,
+        create_database,
+        get_connection,
+        iter_posts_for_analysis,
+        rebuild_sentiment_rollups,
+        rebuild_sentiment_stats,
+        rebuild_term_frequencies,
+        update_post_sentiments_bulk
+    )
     from src.sentiment_analyzer import SentimentAnalyzer
+    from src.sentiment_cache import SentimentCache, CACHE_FILE
+    from src.scoring_pool import ScoringPool
 except ImportError:
     # Fallback for direct imports
-    from database import get_all_posts, update_post_sentiment
+    from database import (
+        count_posts,
+        create_database,
+        get_connection,
+        iter_posts_for_analysis,
+        rebuild_sentiment_rollups,
+        rebuild_sentiment_stats,
+        rebuild_term_frequencies,
+        update_post_sentiments_bulk
+    )
     from sentiment_analyzer import SentimentAnalyzer
+    from sentiment_cache import SentimentCache, CACHE_FILE
+    from scoring_pool import ScoringPool
 
 # Setup logging
 logging.basicConfig(
@@ -31,71 +53,130 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def analyze_all_posts(method='vader', reanalyze=False):
+def score_chunks(analyzer, chunks):
+    """
+    Score chunks of (post_id, content) pairs in the current process
+    
+    Yields:
+        List of (post_id, result) pairs for each chunk
+    """
+    for chunk in chunks:
+        results = analyzer.batch_analyze([content for _, content in chunk])
+        yield [(post_id, result) for (post_id, _), result in zip(chunk, results)]
+
+
+def analyze_all_posts(method='vader', reanalyze=False, batch_size=32, use_cache=True, workers=1,
+                      chunk_size=1000, vader_engine='reference', transformers_backend='pytorch',
+                      model_dir=None, truncation='head'):
     """
     Analyze sentiment for all posts in the database
     
+    Posts are streamed from the database in chunks, scored and written back
+    chunk by chunk, so memory use does not grow with the table size.
+    
     Args:
         method: Sentiment analysis method ('vader', 'textblob', 'transformers')
         reanalyze: If True, reanalyze posts that already have sentiment scores
+        batch_size: Number of posts scored together by batch_analyze
+        use_cache: If True, reuse scores of identical content via the persistent cache
+        workers: Number of scoring processes (1 = score in this process)
+        chunk_size: Number of posts read, scored and written back at a time
+        vader_engine: VADER implementation, 'reference' (vaderSentiment) or 'numpy' (vectorized)
+        transformers_backend: Transformers inference backend, 'pytorch', 'quantized' or 'onnx'
+        model_dir: Local directory with a saved copy of the transformers model (offline)
+        truncation: How long posts are cut to the transformers model's input, 'head' or 'head_tail'
     """
     logger.info(f"Starting sentiment analysis using {method.upper()} method...")
     
     # Initialize analyzer
+    analyzer = None
+    pool = None
+    analyzer_options = {
+        'vader_engine': vader_engine,
+        'transformers_backend': transformers_backend,
+        'model_dir': model_dir,
+        'truncation': truncation
+    }
     try:
-        analyzer = SentimentAnalyzer(method=method)
+        if workers > 1:
+            pool = ScoringPool(
+                method=method,
+                workers=workers,
+                batch_size=batch_size,
+                cache_path=CACHE_FILE if use_cache else None,
+                **analyzer_options
+            ).start()
+        else:
+            cache = SentimentCache(db_path=CACHE_FILE) if use_cache else None
+            analyzer = SentimentAnalyzer(method=method, batch_size=batch_size, cache=cache, **analyzer_options)
     except Exception as e:
         logger.error(f"Failed to initialize analyzer: {e}")
         logger.info("Please install required libraries: pip install -r requirements.txt")
         return
     
-    # Get all posts
-    posts = get_all_posts(limit=10000)
+    try:
+        _analyze_posts(analyzer, pool, reanalyze, chunk_size)
+    finally:
+        if pool is not None:
+            pool.close()
+        if analyzer is not None and analyzer.cache is not None:
+            analyzer.cache.close()
+
+
+def _analyze_posts(analyzer, pool, reanalyze, chunk_size):
+    """Stream pending posts through the in-process analyzer or the worker pool and save them"""
+    # Make sure the schema (and its indexes) is up to date
+    create_database()
+    total_posts = count_posts()
     
-    if not posts:
+    if not total_posts:
         logger.warning("No posts found in database. Please run the scraper first.")
         logger.info("Run: python social_scraper.py")
         return
     
-    logger.info(f"Found {len(posts)} posts in database")
+    # Linked near duplicates are never scored themselves; they share their canonical post's result
+    pending_count = count_posts(unanalyzed_only=not reanalyze, canonical_only=True)
+    logger.info(f"Found {total_posts} posts in database, {pending_count} to analyze")
     
     # Analyze each post
     analyzed_count = 0
-    skipped_count = 0
+    skipped_count = total_posts - pending_count
     error_count = 0
     
-    for post in tqdm(posts, desc="Analyzing posts"):
-        post_id = post[0]
-        content = post[3]
-        existing_sentiment = post[10]  # sentiment_score column
-        
-        # Skip if already analyzed (unless reanalyze flag is set)
-        if existing_sentiment is not None and not reanalyze:
-            skipped_count += 1
-            continue
-        
-        try:
-            # Analyze sentiment
-            result = analyzer.analyze(content)
-            score = result['score']
-            label = result['label']
+    chunks = iter_posts_for_analysis(chunk_size=chunk_size, reanalyze=reanalyze)
+    scored_chunks = pool.imap(chunks) if pool is not None else score_chunks(analyzer, chunks)
+    
+    with tqdm(total=pending_count, desc="Analyzing posts") as progress:
+        for scored in scored_chunks:
+            rows = []
+            for post_id, result in scored:
+                if 'error' in result:
+                    logger.error(f"Error analyzing post {post_id}: {result['error']}")
+                    error_count += 1
+                else:
+                    rows.append((post_id, result['score'], result['label']))
             
-            # Update database
-            update_post_sentiment(post_id, score, label)
-            analyzed_count += 1
+            try:
+                # Update database, one transaction per chunk
+                update_post_sentiments_bulk(rows)
+                analyzed_count += len(rows)
+            except Exception as e:
+                logger.error(f"Error saving {len(rows)} posts: {e}")
+                error_count += len(rows)
             
-        except Exception as e:
-            logger.error(f"Error analyzing post {post_id}: {e}")
-            error_count += 1
-            continue
+            progress.update(len(scored))
     
     logger.info("=" * 60)
     logger.info("SENTIMENT ANALYSIS COMPLETE")
     logger.info("=" * 60)
-    logger.info(f"Total posts: {len(posts)}")
+    logger.info(f"Total posts: {total_posts}")
     logger.info(f"Analyzed: {analyzed_count}")
-    logger.info(f"Skipped (already analyzed): {skipped_count}")
+    logger.info(f"Skipped (already analyzed or near duplicates): {skipped_count}")
     logger.info(f"Errors: {error_count}")
+    if analyzer is not None and analyzer.cache is not None:
+        cache_stats = analyzer.cache.stats()
+        logger.info(f"Cache hits: {cache_stats['hits']} (memory {cache_stats['memory_hits']}, "
+                    f"disk {cache_stats['disk_hits']}), misses: {cache_stats['misses']}")
     logger.info("=" * 60)
     
     if analyzed_count > 0:
@@ -106,12 +187,7 @@ def analyze_all_posts(method='vader', reanalyze=False):
 
 def display_sample_results(limit=10):
     """Display sample sentiment analysis results"""
-    import sqlite3
-    from src.database import DATABASE_FILE
-    
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    
+    cursor = get_connection().cursor()
     cursor.execute('''
         SELECT platform, username, content, sentiment_label, sentiment_score
         FROM posts
@@ -121,7 +197,6 @@ def display_sample_results(limit=10):
     ''', (limit,))
     
     posts = cursor.fetchall()
-    conn.close()
     
     if not posts:
         logger.warning("No analyzed posts found.")
@@ -152,21 +227,90 @@ if __name__ == "__main__":
         default='vader',
         help='Sentiment analysis method (default: vader)'
     )
+    parser.add_argument(
+        '--vader-engine',
+        choices=['reference', 'numpy'],
+        default='reference',
+        help='VADER implementation: vaderSentiment itself or the vectorized NumPy engine with the same scores (default: reference)'
+    )
+    parser.add_argument(
+        '--transformers-backend',
+        choices=['pytorch', 'quantized', 'onnx'],
+        default='pytorch',
+        help='Transformers inference backend: fp32 PyTorch, dynamic int8 quantization or ONNX Runtime (default: pytorch)'
+    )
+    parser.add_argument(
+        '--model-dir',
+        help='Local copy of the transformers model (see scripts/export_model.py); loaded without network access'
+    )
+    parser.add_argument(
+        '--truncation',
+        choices=['head', 'head_tail'],
+        default='head',
+        help='How the transformers method cuts posts longer than 512 tokens: keep the start, or the start and the end (default: head)'
+    )
     parser.add_argument(
         '--reanalyze',
         action='store_true',
         help='Reanalyze posts that already have sentiment scores'
     )
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=32,
+        help='Number of posts scored per batch (default: 32)'
+    )
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=1000,
+        help='Number of posts read, scored and saved at a time (default: 1000)'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Number of scoring processes, e.g. one per core for vader/textblob (default: 1)'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Score every post even if identical content was scored before'
+    )
     parser.add_argument(
         '--sample',
         action='store_true',
         help='Display sample results after analysis'
     )
+    parser.add_argument(
+        '--rebuild-stats',
+        action='store_true',
+        help='Recompute the sentiment statistics summary, time rollups and word counts from all posts and exit'
+    )
     
     args = parser.parse_args()
     
+    if args.rebuild_stats:
+        create_database()
+        rebuild_sentiment_stats()
+        rebuild_sentiment_rollups()
+        rebuild_term_frequencies()
+        logger.info("Sentiment statistics, rollups and word counts rebuilt")
+        sys.exit(0)
+    
     # Run analysis
-    analyze_all_posts(method=args.method, reanalyze=args.reanalyze)
+    analyze_all_posts(
+        method=args.method,
+        reanalyze=args.reanalyze,
+        batch_size=args.batch_size,
+        use_cache=not args.no_cache,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        vader_engine=args.vader_engine,
+        transformers_backend=args.transformers_backend,
+        model_dir=args.model_dir,
+        truncation=args.truncation
+    )
     
     # Show sample results
     if args.sample:
@@ -0,0 +1,344 @@
+"""
+Benchmarks and Equivalence Checks
+Times the performance-sensitive code paths and verifies that optimized
+implementations still produce the same results as the originals where that
+needs real data or models (preprocessing and VADER are checked in tests/).
+
+Usage:
+    python scripts/benchmark.py preprocess
+    python scripts/benchmark.py hn-parse [--html page.html ...]
+    python scripts/benchmark.py importtime [--repeat 5]
+    python scripts/benchmark.py vader [--size 20000]
+    python scripts/benchmark.py transformers --model-dir models/twitter-roberta-base-sentiment-latest
+"""
+
+import argparse
+import json
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root and src to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / 'src'))
+
+try:
+    from src.sentiment_analyzer import SentimentAnalyzer, preprocess_text, preprocess_batch
+    from src.hn_parser import parse_hacker_news, default_parser
+    from src.vader_engine import VectorizedVader
+    from src.transformer_backends import TRANSFORMER_BACKENDS, TRUNCATION_STRATEGIES, length_batches
+    from src.analyzer_registry import estimate_memory
+except ImportError:
+    # Fallback for direct imports
+    from sentiment_analyzer import SentimentAnalyzer, preprocess_text, preprocess_batch
+    from hn_parser import parse_hacker_news, default_parser
+    from vader_engine import VectorizedVader
+    from transformer_backends import TRANSFORMER_BACKENDS, TRUNCATION_STRATEGIES, length_batches
+    from analyzer_registry import estimate_memory
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+
+
+def timed(func, *args, repeat=5):
+    """Return the best wall time of func(*args) over several runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+# ==================== TEXT PREPROCESSING ====================
+
+def legacy_preprocess_text(text):
+    """Original multi-pass preprocessor, kept as the timing baseline"""
+    if not text:
+        return ""
+    text = re.sub(r'http\S+|www.\S+', '', text)
+    text = re.sub(r'@\w+', '', text)
+    text = re.sub(r'#', '', text)
+    text = ' '.join(text.split())
+    return text.strip()
+
+
+def realistic_corpus(count, seed=42):
+    """Social-media-like posts with URLs, mentions and hashtags"""
+    rng = random.Random(seed)
+    words = ['great', 'terrible', 'product', 'love', 'the', 'new', 'update', 'is', 'not', 'bad']
+    extras = ['https://t.co/abc123', 'www.example.com/x', '@someone', '#python', '#AI', '😊']
+    posts = []
+    for _ in range(count):
+        tokens = [rng.choice(words) for _ in range(rng.randint(5, 40))]
+        for _ in range(rng.randint(0, 4)):
+            tokens.insert(rng.randrange(len(tokens) + 1), rng.choice(extras))
+        posts.append('  '.join(tokens))
+    return posts
+
+
+def bench_preprocess(args):
+    """Time preprocess_text/preprocess_batch against the legacy implementation"""
+    corpus = realistic_corpus(args.size)
+    legacy_time = timed(lambda: [legacy_preprocess_text(text) for text in corpus])
+    single_time = timed(lambda: [preprocess_text(text) for text in corpus])
+    batch_time = timed(preprocess_batch, corpus)
+
+    print(f"Timing over {len(corpus)} posts (best of 5):")
+    print(f"   legacy           {legacy_time * 1000:8.1f} ms")
+    print(f"   preprocess_text  {single_time * 1000:8.1f} ms  ({legacy_time / single_time:.1f}x)")
+    print(f"   preprocess_batch {batch_time * 1000:8.1f} ms  ({legacy_time / batch_time:.1f}x)")
+    return 0
+
+
+# ==================== HACKER NEWS PARSING ====================
+
+def bench_hn_parse(args):
+    """Check the lxml and soup Hacker News parsers agree on saved pages and time them"""
+    paths = args.html or sorted(FIXTURES_DIR.glob('hackernews*.html'))
+    if not paths:
+        print(f"No Hacker News fixtures found in {FIXTURES_DIR}")
+        return 1
+    parsers = ['soup'] + (['lxml'] if default_parser() == 'lxml' else [])
+    if len(parsers) == 1:
+        print("lxml is not installed; timing the soup parser only")
+
+    failures = 0
+    for path in paths:
+        html = Path(path).read_bytes()
+        results = {name: parse_hacker_news(html, limit=args.limit, parser=name) for name in parsers}
+        stories = results['soup']
+        agree = all(result == stories for result in results.values())
+        failures += not agree
+
+        print(f"{Path(path).name}: {len(stories)} stories, {len(html) / 1024:.0f} KiB, "
+              f"parsers {'agree' if agree else 'DISAGREE'}")
+        for story in stories[:3]:
+            print(f"   {story['score']:5d} pts {story['comments']:4d} comments  "
+                  f"{story['author'] or '-':<12} {story['title'][:50]}")
+
+        times = {name: timed(parse_hacker_news, html, args.limit, name, repeat=args.repeat)
+                 for name in parsers}
+        for name in parsers:
+            print(f"   {name:<5} {times[name] * 1000:8.2f} ms  ({times['soup'] / times[name]:.1f}x)")
+    return 1 if failures else 0
+
+
+# ==================== VECTORIZED VADER ====================
+
+def bench_vader(args):
+    """Time the vectorized VADER engine against vaderSentiment"""
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+    reference = SentimentIntensityAnalyzer()
+    engine = VectorizedVader(reference)
+
+    short_posts = preprocess_batch(realistic_corpus(args.size))
+    long_posts = [' '.join([text] * 8) for text in short_posts[:args.size // 8]]
+    for name, corpus in (('short posts', short_posts), ('long posts', long_posts)):
+        reference_time = timed(lambda: [reference.polarity_scores(text) for text in corpus], repeat=args.repeat)
+        print(f"Timing over {len(corpus)} {name} (best of {args.repeat}):")
+        print(f"   vaderSentiment      {reference_time * 1000:8.1f} ms")
+        for batch_size in args.batch_sizes:
+            engine_time = timed(lambda: [engine.polarity_scores_batch(corpus[start:start + batch_size])
+                                         for start in range(0, len(corpus), batch_size)], repeat=args.repeat)
+            print(f"   numpy, batch {batch_size:<6} {engine_time * 1000:8.1f} ms  "
+                  f"({reference_time / engine_time:.1f}x)")
+    return 0
+
+
+# ==================== TRANSFORMER BACKENDS ====================
+
+def load_labeled_posts(path):
+    """Read a JSON-lines fixture of {"text": ..., "label": ...} posts"""
+    with open(path, encoding='utf-8') as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return [row['text'] for row in rows], [row['label'] for row in rows]
+
+
+def bench_bucketing(model, texts, batch_size, repeat):
+    """Padding and forward-pass time of arrival-order batches against length_batches"""
+    encoded = model.encode(texts)
+    arrival = [list(range(start, min(start + batch_size, len(encoded))))
+               for start in range(0, len(encoded), batch_size)]
+    real = sum(len(ids) for ids in encoded)
+    print(f"Batching {len(texts)} mixed short/long posts ({real} tokens):")
+    for name, batches in (('arrival order', arrival), ('length buckets', length_batches(encoded, batch_size))):
+        padded = sum(len(batch) * max(len(encoded[position]) for position in batch) for batch in batches)
+        elapsed = timed(lambda: [model.predict_encoded([encoded[position] for position in batch])
+                                 for batch in batches], repeat=repeat)
+        print(f"   {name:<15} {padded:7d} padded tokens ({1 - real / padded:5.1%} padding)  "
+              f"{len(texts) / elapsed:7.1f} posts/s")
+
+
+def bench_transformers(args):
+    """Compare the transformers backends with the fp32 PyTorch baseline on labeled posts"""
+    texts, labels = load_labeled_posts(args.fixture)
+    print(f"{len(texts)} labeled posts from {args.fixture}, batch size {args.batch_size}, "
+          f"best of {args.repeat}")
+
+    baseline = None
+    for backend in ['pytorch'] + [name for name in args.backends if name != 'pytorch']:
+        try:
+            start = time.perf_counter()
+            analyzer = SentimentAnalyzer(method='transformers', batch_size=args.batch_size,
+                                         transformers_backend=backend, model_dir=args.model_dir,
+                                         truncation=args.truncation)
+            load_seconds = time.perf_counter() - start
+        except Exception as e:
+            print(f"   {backend:<10} unavailable: {e}")
+            if backend == 'pytorch':
+                return 1
+            continue
+
+        results = analyzer.batch_analyze(texts)
+        elapsed = timed(analyzer.batch_analyze, texts, repeat=args.repeat)
+        predicted = [result['label'] for result in results]
+        scores = [result['score'] for result in results]
+        accuracy = sum(p == l for p, l in zip(predicted, labels)) / len(labels)
+
+        line = (f"   {backend:<10} load {load_seconds:5.1f} s  {estimate_memory(analyzer) / 2**20:7.1f} MiB  "
+                f"{len(texts) / elapsed:7.1f} posts/s  accuracy {accuracy:.1%}")
+        if baseline is None:
+            baseline = (predicted, scores, elapsed)
+        else:
+            base_predicted, base_scores, base_elapsed = baseline
+            agreement = sum(p == b for p, b in zip(predicted, base_predicted)) / len(texts)
+            deltas = [abs(s - b) for s, b in zip(scores, base_scores)]
+            line += (f"  ({base_elapsed / elapsed:.1f}x, agrees {agreement:.1%}, "
+                     f"|delta score| max {max(deltas):.3f} mean {sum(deltas) / len(deltas):.3f})")
+        print(line)
+        if backend == 'pytorch':
+            # Tweets mixed with selftexts of a few hundred tokens, in arrival order
+            rng = random.Random(42)
+            mixed = texts + [' '.join(rng.sample(texts, 12)) for _ in range(len(texts) // 3)]
+            rng.shuffle(mixed)
+            bench_bucketing(analyzer.analyzer, mixed, args.batch_size, args.repeat)
+        del analyzer
+    return 0
+
+
+# ==================== IMPORT TIME ====================
+
+# Modules timed by `importtime`, with the cumulative import budget (ms) that
+# fails the run when exceeded (None = reported only). src.database is all
+# `main.py` option 3 (view statistics) imports.
+IMPORT_BUDGETS = {
+    'src': 20,
+    'src.database': 50,
+    'src.sentiment_analyzer': 50,
+    'src.social_scraper': None,
+    'src.job_runner': None,
+}
+
+
+def measure_import(module):
+    """
+    Import module in a fresh interpreter under `python -X importtime`
+
+    Returns:
+        Tuple of (cumulative ms for module, [(self ms, name)] of every module it loaded)
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=project_root, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    loaded = []
+    for line in result.stderr.splitlines():
+        fields = line.split('|')
+        if not line.startswith('import time:') or len(fields) != 3:
+            continue
+        self_us, cumulative_us, name = fields[0].split(':')[1], fields[1], fields[2]
+        if not self_us.strip().isdigit():
+            continue  # header line
+        loaded.append((int(self_us) / 1000, name.strip()))
+        if name.strip() == module:
+            # Imports are printed children first; the module's own line closes its subtree
+            return int(cumulative_us) / 1000, loaded
+    return 0.0, []
+
+
+def bench_importtime(args):
+    """Time importing each src module in a fresh interpreter and check it against its budget"""
+    failures = 0
+    print(f"Cumulative import time (best of {args.repeat}, excluding interpreter startup):")
+    for module, budget in IMPORT_BUDGETS.items():
+        runs = [measure_import(module) for _ in range(args.repeat)]
+        best, loaded = min(runs, key=lambda run: run[0])
+        over = budget is not None and best > budget
+        failures += over
+
+        status = '' if budget is None else f"budget {budget} ms{'  OVER BUDGET' if over else ''}"
+        print(f"   {module:<24} {best:8.1f} ms  {status}")
+        if args.verbose or over:
+            for self_ms, name in sorted(loaded, reverse=True)[:args.top]:
+                print(f"      {self_ms:7.1f} ms  {name}")
+
+    # End to end: interpreter startup plus `main.py` option 3, against a scratch
+    # database so the real one is never created or migrated. The first run
+    # creates it; the timed one reads it like an existing install would.
+    with tempfile.TemporaryDirectory() as tmp:
+        run_main = (
+            "import runpy, sys; sys.path.insert(0, sys.argv[1]); "
+            "from src import database; database.DATABASE_FILE = sys.argv[2]; "
+            "runpy.run_path(sys.argv[1] + '/main.py', run_name='__main__')"
+        )
+        command = [sys.executable, '-c', run_main, str(project_root), str(Path(tmp) / 'scraped_data.db')]
+        subprocess.run(command, input='3\n', cwd=tmp, capture_output=True, text=True)
+        start = time.perf_counter()
+        subprocess.run(command, input='3\n', cwd=tmp, capture_output=True, text=True)
+        print(f"main.py option 3 (view statistics), whole process: "
+              f"{(time.perf_counter() - start) * 1000:.0f} ms")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark and verify optimized code paths")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    preprocess = subparsers.add_parser('preprocess', help='Text preprocessing speed')
+    preprocess.add_argument('--size', type=int, default=20000, help='Posts in the timing corpus')
+    preprocess.set_defaults(func=bench_preprocess)
+
+    hn_parse = subparsers.add_parser('hn-parse', help='Hacker News parser equivalence and speed')
+    hn_parse.add_argument('--html', nargs='+', help='Saved pages to parse (default: scripts/fixtures)')
+    hn_parse.add_argument('--limit', type=int, default=30, help='Stories extracted per page')
+    hn_parse.add_argument('--repeat', type=int, default=20, help='Timing runs per parser')
+    hn_parse.set_defaults(func=bench_hn_parse)
+
+    importtime = subparsers.add_parser('importtime', help='Import time of the src modules against budgets')
+    importtime.add_argument('--repeat', type=int, default=5, help='Fresh interpreters per module')
+    importtime.add_argument('--top', type=int, default=10, help='Slowest modules listed per breakdown')
+    importtime.add_argument('--verbose', action='store_true', help='List the slowest modules for every target')
+    importtime.set_defaults(func=bench_importtime)
+
+    vader = subparsers.add_parser('vader', help='Vectorized VADER engine speed')
+    vader.add_argument('--size', type=int, default=20000, help='Posts in each corpus')
+    vader.add_argument('--batch-sizes', type=int, nargs='+', default=[32, 256, 2048],
+                       help='Batch sizes timed for the vectorized engine')
+    vader.add_argument('--repeat', type=int, default=3, help='Timing runs per implementation')
+    vader.set_defaults(func=bench_vader)
+
+    transformers = subparsers.add_parser('transformers', help='Transformer backends against the fp32 baseline')
+    transformers.add_argument('--model-dir', help='Local model directory (default: download from the Hub)')
+    transformers.add_argument('--backends', nargs='+', choices=TRANSFORMER_BACKENDS,
+                              default=list(TRANSFORMER_BACKENDS), help='Backends compared with pytorch')
+    transformers.add_argument('--fixture', default=str(FIXTURES_DIR / 'labeled_posts.jsonl'),
+                              help='JSON-lines file of labeled posts')
+    transformers.add_argument('--batch-size', type=int, default=32, help='Posts per forward pass')
+    transformers.add_argument('--truncation', choices=TRUNCATION_STRATEGIES, default='head',
+                              help='How posts longer than the model input are cut')
+    transformers.add_argument('--repeat', type=int, default=3, help='Timing runs per backend')
+    transformers.set_defaults(func=bench_transformers)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -19,7 +19,8 @@ try:
         get_posts_by_sentiment,
         get_sentiment_statistics
     )
-    from src.sentiment_analyzer import SentimentAnalyzer, analyze_post
+    from src.sentiment_analyzer import analyze_post
+    from src.analyzer_registry import get_analyzer
 except ImportError:
     # Fallback for direct imports
     from database import (
@@ -28,7 +29,8 @@ except ImportError:
         get_posts_by_sentiment,
         get_sentiment_statistics
     )
-    from sentiment_analyzer import SentimentAnalyzer, analyze_post
+    from sentiment_analyzer import analyze_post
+    from analyzer_registry import get_analyzer
 
 def test_sentiment_analyzers():
     """Test different sentiment analysis methods"""
@@ -49,7 +51,7 @@ def test_sentiment_analyzers():
         print("-" * 70)
         
         try:
-            analyzer = SentimentAnalyzer(method=method)
+            analyzer = get_analyzer(method)
             
             for text in test_texts:
                 result = analyzer.analyze(text)
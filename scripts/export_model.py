@@ -0,0 +1,66 @@
+"""
+Model Export Script
+Saves the transformers sentiment model to a local directory so it can be
+loaded offline (--model-dir), and optionally exports it to ONNX for the
+onnx inference backend.
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+# Add project root and src to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / 'src'))
+
+try:
+    from src.sentiment_analyzer import TRANSFORMERS_MODEL
+    from src.transformer_backends import export_onnx, save_model
+except ImportError:
+    # Fallback for direct imports
+    from sentiment_analyzer import TRANSFORMERS_MODEL
+    from transformer_backends import export_onnx, save_model
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_OUTPUT = project_root / 'models' / 'twitter-roberta-base-sentiment-latest'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Save the sentiment model locally and export it to ONNX")
+    parser.add_argument('--model', default=TRANSFORMERS_MODEL,
+                        help=f'Hugging Face model id or local directory to copy (default: {TRANSFORMERS_MODEL})')
+    parser.add_argument('--output', default=str(DEFAULT_OUTPUT),
+                        help='Directory to save the model to (default: models/twitter-roberta-base-sentiment-latest)')
+    parser.add_argument('--local-files-only', action='store_true',
+                        help='Copy from the Hugging Face cache without downloading')
+    parser.add_argument('--onnx', action='store_true', help='Also export the model to ONNX')
+    parser.add_argument('--opset', type=int, default=14, help='ONNX opset version (default: 14)')
+    parser.add_argument('--tolerance', type=float, default=1e-3,
+                        help='Largest logit difference accepted between ONNX and PyTorch')
+    args = parser.parse_args()
+
+    output = Path(args.output)
+    if Path(args.model).resolve() != output.resolve():
+        save_model(args.model, output, local_files_only=args.local_files_only)
+        logger.info(f"Saved {args.model} to {output}")
+
+    if args.onnx:
+        path, difference = export_onnx(output, opset=args.opset)
+        if difference > args.tolerance:
+            logger.error(f"ONNX export of {path} differs from PyTorch by {difference:.2e}")
+            return 1
+
+    logger.info(f"Use it offline with: python scripts/analyze_sentiment.py --method transformers --model-dir {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
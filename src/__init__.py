@@ -1,34 +1,55 @@
 """
 Source package for Sentiment Analysis of Social Media Posts
 Contains core modules: database, social_scraper, sentiment_analyzer
+
+Exports are loaded lazily (PEP 562): importing the package or one of its
+light modules (e.g. src.database) does not pull in requests, bs4 or the
+sentiment libraries until an attribute that needs them is first used.
 """
 
+from importlib import import_module
+
 __version__ = "1.0.0"
 __author__ = "adityashm"
 
-# Import main components for easier access
-from .database import (
-    create_database,
-    insert_post,
-    update_post_sentiment,
-    get_all_posts,
-    get_posts_by_platform,
-    get_posts_by_sentiment,
-    get_sentiment_statistics
-)
-
-from .sentiment_analyzer import SentimentAnalyzer, analyze_post
-from .social_scraper import SocialMediaScraper
-
-__all__ = [
-    'create_database',
-    'insert_post',
-    'update_post_sentiment',
-    'get_all_posts',
-    'get_posts_by_platform',
-    'get_posts_by_sentiment',
-    'get_sentiment_statistics',
-    'SentimentAnalyzer',
-    'analyze_post',
-    'SocialMediaScraper'
-]
+# Exported name -> submodule defining it
+_EXPORTS = {
+    'get_connection': 'database',
+    'transaction': 'database',
+    'create_database': 'database',
+    'insert_post': 'database',
+    'insert_posts_bulk': 'database',
+    'update_post_sentiment': 'database',
+    'update_post_sentiments_bulk': 'database',
+    'get_all_posts': 'database',
+    'get_posts_by_platform': 'database',
+    'get_posts_by_sentiment': 'database',
+    'get_sentiment_statistics': 'database',
+    'rebuild_sentiment_stats': 'database',
+    'get_sentiment_timeline': 'database',
+    'get_sentiment_breakdown': 'database',
+    'get_filtered_posts': 'database',
+    'get_term_frequencies': 'database',
+    'find_near_duplicates': 'database',
+    'rebuild_near_duplicate_index': 'database',
+    'search_posts': 'database',
+    'SentimentAnalyzer': 'sentiment_analyzer',
+    'analyze_post': 'sentiment_analyzer',
+    'get_analyzer': 'analyzer_registry',
+    'SocialMediaScraper': 'social_scraper'
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    """Import the submodule behind an export on first access"""
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,197 @@
+"""
+Analyzer Registry
+Process-wide store of warm SentimentAnalyzer instances, keyed on method and
+configuration, so models (the RoBERTa pipeline in particular) are loaded
+once per process and then shared by every caller and thread.
+
+Instances are built on first use, or ahead of time with warm_up, and can be
+released again with unload. Each entry records how long it took to load and
+roughly how much memory it holds.
+"""
+
+import gc
+import inspect
+import logging
+import sys
+import threading
+import time
+import types
+from typing import Dict, List, Optional
+
+try:
+    from .sentiment_analyzer import SentimentAnalyzer
+    from .sentiment_cache import SentimentCache
+except ImportError:
+    from sentiment_analyzer import SentimentAnalyzer
+    from sentiment_cache import SentimentCache
+
+logger = logging.getLogger(__name__)
+
+# SentimentAnalyzer's option defaults: passing a default explicitly must
+# find the same instance as leaving it out
+_OPTION_DEFAULTS = {name: parameter.default
+                    for name, parameter in inspect.signature(SentimentAnalyzer).parameters.items()}
+
+# Objects never counted as part of an analyzer: they are shared process-wide
+_SHARED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+
+def _deep_sizeof(obj) -> int:
+    """Approximate bytes held by obj's containers and instance attributes"""
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, _SHARED_TYPES):
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        elif hasattr(item, '__dict__'):
+            stack.append(item.__dict__)
+    return total
+
+
+def estimate_memory(analyzer: SentimentAnalyzer) -> int:
+    """
+    Approximate memory held by an analyzer's model
+
+    Returns:
+        Weight bytes reported by transformer backends, otherwise the size
+        of the analyzer's object graph (e.g. the VADER lexicon); 0 for
+        TextBlob, whose lexicon is module state shared process-wide
+    """
+    if hasattr(analyzer.analyzer, 'memory_bytes'):
+        return analyzer.analyzer.memory_bytes()
+    return _deep_sizeof(analyzer.analyzer)
+
+
+class _Entry:
+    """A registered analyzer plus its accounting"""
+
+    def __init__(self, analyzer: SentimentAnalyzer, load_seconds: float):
+        self.analyzer = analyzer
+        self.load_seconds = load_seconds
+        self.memory_bytes = estimate_memory(analyzer)
+        self.uses = 0
+
+
+class AnalyzerRegistry:
+    """Thread-safe registry handing out one shared SentimentAnalyzer per configuration"""
+
+    def __init__(self):
+        self._entries: Dict[tuple, _Entry] = {}
+        # One build lock per key: concurrent first requests build a model once,
+        # and loading a slow model never blocks lookups of other keys
+        self._build_locks: Dict[tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(method: str, batch_size: int, cache_path, options: Dict[str, any]) -> tuple:
+        return (method, batch_size, str(cache_path) if cache_path else None,
+                tuple(sorted((name, str(value)) for name, value in options.items()
+                             if value != _OPTION_DEFAULTS.get(name))))
+
+    def get(self, method: str = 'vader', batch_size: int = 32, cache_path=None, **options) -> SentimentAnalyzer:
+        """
+        Return the shared analyzer for a configuration, building it on first use
+
+        Args:
+            method: 'vader', 'textblob', or 'transformers'
+            batch_size: Batch size of the analyzer's batch_analyze
+            cache_path: SQLite file backing the analyzer's SentimentCache (None = no cache)
+            **options: Further SentimentAnalyzer options (vader_engine,
+                transformers_backend, model_dir, truncation)
+
+        Returns:
+            SentimentAnalyzer shared with every other caller using the same configuration
+        """
+        key = self._key(method, batch_size, cache_path, options)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.uses += 1
+                return entry.analyzer
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+
+        with build_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is None:
+                start = time.perf_counter()
+                cache = SentimentCache(db_path=cache_path) if cache_path else None
+                analyzer = SentimentAnalyzer(method=method, batch_size=batch_size, cache=cache, **options)
+                entry = _Entry(analyzer, time.perf_counter() - start)
+                logger.info(f"Loaded {method} analyzer in {entry.load_seconds:.2f}s "
+                            f"(~{entry.memory_bytes / 2**20:.1f} MiB)")
+                # Registered before build_lock is released, so a caller waiting
+                # on it finds this entry instead of building a second one
+                with self._lock:
+                    self._entries[key] = entry
+
+            with self._lock:
+                entry.uses += 1
+        return entry.analyzer
+
+    def warm_up(self, method: str = 'vader', batch_size: int = 32, cache_path=None, **options) -> SentimentAnalyzer:
+        """Build a configuration's analyzer now, so the first real request is fast"""
+        return self.get(method, batch_size, cache_path, **options)
+
+    def unload(self, method: Optional[str] = None) -> int:
+        """
+        Drop registered analyzers so their models can be freed
+
+        Callers still holding an instance can keep using it (its cache is
+        closed, so it scores every text anew); it is released once they let
+        go of it.
+
+        Args:
+            method: Only unload analyzers of this method (None = all)
+
+        Returns:
+            Number of analyzers unloaded
+        """
+        with self._lock:
+            keys = [key for key in self._entries if method is None or key[0] == method]
+            entries = [self._entries.pop(key) for key in keys]
+
+        for entry in entries:
+            if entry.analyzer.cache is not None:
+                entry.analyzer.cache.close()
+        if entries:
+            gc.collect()
+            logger.info(f"Unloaded {len(entries)} analyzer(s), "
+                        f"~{sum(entry.memory_bytes for entry in entries) / 2**20:.1f} MiB")
+        return len(entries)
+
+    def loaded(self) -> List[Dict[str, any]]:
+        """Method, configuration, load time, memory and use count of each registered analyzer"""
+        with self._lock:
+            return [{
+                'method': method,
+                'batch_size': batch_size,
+                'cache_path': cache_path,
+                'options': dict(options),
+                'load_seconds': entry.load_seconds,
+                'memory_bytes': entry.memory_bytes,
+                'uses': entry.uses
+            } for (method, batch_size, cache_path, options), entry in self._entries.items()]
+
+    def memory_usage(self) -> int:
+        """Approximate bytes held by all registered analyzers"""
+        with self._lock:
+            return sum(entry.memory_bytes for entry in self._entries.values())
+
+
+# Registry shared by the whole process
+registry = AnalyzerRegistry()
+
+
+def get_analyzer(method: str = 'vader', batch_size: int = 32, cache_path=None, **options) -> SentimentAnalyzer:
+    """Return the process-wide shared analyzer for a configuration (see AnalyzerRegistry.get)"""
+    return registry.get(method, batch_size, cache_path, **options)
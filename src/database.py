@@ -1,13 +1,485 @@
+import logging
+import os
 import sqlite3
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
 from pathlib import Path
+try:
+    from . import near_duplicates, word_frequencies
+except ImportError:
+    import near_duplicates
+    import word_frequencies
+
+logger = logging.getLogger(__name__)
 
 DATABASE_FILE = Path(__file__).parent / 'scraped_data.db'
 
+# Applied to every new connection. WAL lets readers (dashboard) and a writer
+# (scraper/analyzer) work concurrently; the busy timeout waits out short locks.
+CONNECTION_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA cache_size=-65536',       # 64 MB page cache
+    'PRAGMA mmap_size=268435456',     # 256 MB memory-mapped I/O
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA busy_timeout=30000',
+)
+
+_local = threading.local()
+
+# Set by open_read_only: new connections are opened with mode=ro
+READ_ONLY = False
+
+# Posts whose SimHash similarity to an earlier post reaches this threshold are
+# near duplicates (see insert_posts_bulk's near_duplicates argument)
+NEAR_DUPLICATE_THRESHOLD = near_duplicates.DEFAULT_THRESHOLD
+DEDUP_MODES = ('link', 'skip', 'keep')
+
+# Recomputes sentiment_stats from scratch (migration backfill and rebuild)
+_SENTIMENT_STATS_BACKFILL = '''
+    INSERT INTO sentiment_stats
+        (platform, total_posts, scored_posts, score_sum, positive_count, negative_count, neutral_count)
+    SELECT
+        platform,
+        COUNT(*),
+        COUNT(sentiment_score),
+        COALESCE(SUM(sentiment_score), 0),
+        COUNT(CASE WHEN sentiment_label = 'positive' THEN 1 END),
+        COUNT(CASE WHEN sentiment_label = 'negative' THEN 1 END),
+        COUNT(CASE WHEN sentiment_label = 'neutral' THEN 1 END)
+    FROM posts
+    WHERE sentiment_label IS NOT NULL
+    GROUP BY platform
+'''
+
+# Trigger bodies adding (+1) or removing (-1) one analyzed post's contribution
+def _sentiment_stats_delta(row, sign):
+    return f'''
+        INSERT OR IGNORE INTO sentiment_stats (platform)
+        SELECT {row}.platform WHERE {row}.sentiment_label IS NOT NULL;
+        UPDATE sentiment_stats SET
+            total_posts = total_posts {sign} 1,
+            scored_posts = scored_posts {sign} ({row}.sentiment_score IS NOT NULL),
+            score_sum = score_sum {sign} COALESCE({row}.sentiment_score, 0),
+            positive_count = positive_count {sign} ({row}.sentiment_label = 'positive'),
+            negative_count = negative_count {sign} ({row}.sentiment_label = 'negative'),
+            neutral_count = neutral_count {sign} ({row}.sentiment_label = 'neutral')
+        WHERE platform = {row}.platform AND {row}.sentiment_label IS NOT NULL;
+    '''
+
+# Time-bucketed rollups of analyzed posts: granularity -> (table, SQLite
+# expression mapping a timestamp onto the start of its bucket)
+ROLLUP_GRANULARITIES = {
+    'hour': ('sentiment_rollup_hourly', "strftime('%Y-%m-%d %H:00:00', {time})"),
+    'day': ('sentiment_rollup_daily', "date({time})"),
+}
+
+def _rollup_backfill(table, bucket):
+    return f'''
+        INSERT INTO {table}
+            (bucket, platform, sentiment_label, post_count, score_sum, score_sq_sum)
+        SELECT
+            {bucket.format(time='scraped_at')},
+            platform,
+            sentiment_label,
+            COUNT(*),
+            COALESCE(SUM(sentiment_score), 0),
+            COALESCE(SUM(sentiment_score * sentiment_score), 0)
+        FROM posts
+        WHERE sentiment_label IS NOT NULL
+        GROUP BY 1, platform, sentiment_label
+    '''
+
+# Trigger bodies adding (+1) or removing (-1) one analyzed post from its rollup buckets
+def _rollup_delta(row, sign):
+    statements = []
+    for table, bucket in ROLLUP_GRANULARITIES.values():
+        bucket = bucket.format(time=f'{row}.scraped_at')
+        statements.append(f'''
+            INSERT OR IGNORE INTO {table} (bucket, platform, sentiment_label)
+            SELECT {bucket}, {row}.platform, {row}.sentiment_label WHERE {row}.sentiment_label IS NOT NULL;
+            UPDATE {table} SET
+                post_count = post_count {sign} 1,
+                score_sum = score_sum {sign} COALESCE({row}.sentiment_score, 0),
+                score_sq_sum = score_sq_sum {sign} COALESCE({row}.sentiment_score * {row}.sentiment_score, 0)
+            WHERE bucket = {bucket} AND platform = {row}.platform
+                AND sentiment_label = {row}.sentiment_label;
+        ''')
+        if sign == '-':
+            statements.append(f'''
+            DELETE FROM {table}
+            WHERE bucket = {bucket} AND platform = {row}.platform
+                AND sentiment_label = {row}.sentiment_label AND post_count <= 0;
+            ''')
+    return ''.join(statements)
+
+# Trigger body queueing one post's words for addition (1) or removal (-1)
+def _term_queue_entry(row, sign):
+    return f'''
+        INSERT INTO term_frequency_queue (platform, sentiment_label, content, sign)
+        SELECT {row}.platform, {row}.sentiment_label, {row}.content, {sign}
+        WHERE {row}.sentiment_label IS NOT NULL;
+    '''
+
+# Versioned schema changes, applied in order by create_database. Each entry is
+# (version, name, statements); never edit an applied migration, append a new one.
+MIGRATIONS = [
+    (1, 'posts_query_indexes', [
+        # get_posts_by_platform, dashboard platform filter
+        'CREATE INDEX IF NOT EXISTS idx_posts_platform_scraped ON posts (platform, scraped_at)',
+        # get_posts_by_sentiment, dashboard sentiment filter
+        'CREATE INDEX IF NOT EXISTS idx_posts_sentiment_scraped ON posts (sentiment_label, scraped_at)',
+        # get_all_posts, dashboard timeline
+        'CREATE INDEX IF NOT EXISTS idx_posts_scraped ON posts (scraped_at)',
+        # iter_posts_for_analysis / count_posts(unanalyzed_only=True)
+        'CREATE INDEX IF NOT EXISTS idx_posts_unanalyzed ON posts (id) WHERE sentiment_score IS NULL',
+    ]),
+    (2, 'sentiment_stats_summary', [
+        # Per-platform running totals over analyzed posts, kept current by triggers
+        '''
+        CREATE TABLE IF NOT EXISTS sentiment_stats (
+            platform TEXT PRIMARY KEY,
+            total_posts INTEGER NOT NULL DEFAULT 0,
+            scored_posts INTEGER NOT NULL DEFAULT 0,
+            score_sum REAL NOT NULL DEFAULT 0,
+            positive_count INTEGER NOT NULL DEFAULT 0,
+            negative_count INTEGER NOT NULL DEFAULT 0,
+            neutral_count INTEGER NOT NULL DEFAULT 0
+        )
+        ''',
+        _SENTIMENT_STATS_BACKFILL,
+        f'''
+        CREATE TRIGGER IF NOT EXISTS posts_stats_insert AFTER INSERT ON posts
+        BEGIN {_sentiment_stats_delta('NEW', '+')} END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS posts_stats_delete AFTER DELETE ON posts
+        BEGIN {_sentiment_stats_delta('OLD', '-')} END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS posts_stats_update
+        AFTER UPDATE OF platform, sentiment_score, sentiment_label ON posts
+        BEGIN {_sentiment_stats_delta('OLD', '-')} {_sentiment_stats_delta('NEW', '+')} END
+        ''',
+    ]),
+    (3, 'crawl_state', [
+        # Per-source high-water mark of the newest item seen by incremental crawls
+        '''
+        CREATE TABLE IF NOT EXISTS crawl_state (
+            source TEXT PRIMARY KEY,
+            last_seen_utc REAL,
+            last_seen_id TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+    ]),
+    (4, 'near_duplicate_index', [
+        # Near duplicates point at the first post of their group and share its sentiment
+        'ALTER TABLE posts ADD COLUMN canonical_id INTEGER REFERENCES posts (id)',
+        'CREATE INDEX IF NOT EXISTS idx_posts_canonical ON posts (canonical_id) WHERE canonical_id IS NOT NULL',
+        # SimHash of every post's content, split into bands for equality lookups
+        '''
+        CREATE TABLE IF NOT EXISTS post_fingerprints (
+            post_id INTEGER PRIMARY KEY,
+            simhash INTEGER NOT NULL,
+            band0 INTEGER NOT NULL,
+            band1 INTEGER NOT NULL,
+            band2 INTEGER NOT NULL,
+            band3 INTEGER NOT NULL
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_fingerprints_band0 ON post_fingerprints (band0)',
+        'CREATE INDEX IF NOT EXISTS idx_fingerprints_band1 ON post_fingerprints (band1)',
+        'CREATE INDEX IF NOT EXISTS idx_fingerprints_band2 ON post_fingerprints (band2)',
+        'CREATE INDEX IF NOT EXISTS idx_fingerprints_band3 ON post_fingerprints (band3)',
+        '''
+        CREATE TRIGGER IF NOT EXISTS posts_fingerprint_delete AFTER DELETE ON posts
+        BEGIN
+            DELETE FROM post_fingerprints WHERE post_id = OLD.id;
+            UPDATE posts SET canonical_id = NULL WHERE canonical_id = OLD.id;
+        END
+        ''',
+        # Fingerprint and link the posts stored before the index existed
+        lambda cursor: _index_near_duplicates(cursor.connection, NEAR_DUPLICATE_THRESHOLD),
+    ]),
+    (5, 'posts_fulltext_search', [
+        # External-content FTS5 index over posts.content (the text is not stored twice)
+        '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+            content,
+            content='posts',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS posts_fts_insert AFTER INSERT ON posts
+        BEGIN
+            INSERT INTO posts_fts (rowid, content) VALUES (NEW.id, NEW.content);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS posts_fts_delete AFTER DELETE ON posts
+        BEGIN
+            INSERT INTO posts_fts (posts_fts, rowid, content) VALUES ('delete', OLD.id, OLD.content);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS posts_fts_update AFTER UPDATE OF content ON posts
+        BEGIN
+            INSERT INTO posts_fts (posts_fts, rowid, content) VALUES ('delete', OLD.id, OLD.content);
+            INSERT INTO posts_fts (rowid, content) VALUES (NEW.id, NEW.content);
+        END
+        ''',
+        # Index the posts stored before the table existed
+        "INSERT INTO posts_fts (posts_fts) VALUES ('rebuild')",
+    ]),
+    (6, 'sentiment_rollups', [
+        # Hourly and daily per-platform/label totals of analyzed posts (by scraped_at),
+        # kept current by triggers; sum of squares allows variance without a scan
+        '''
+        CREATE TABLE IF NOT EXISTS sentiment_rollup_hourly (
+            bucket TEXT NOT NULL,
+            platform TEXT NOT NULL,
+            sentiment_label TEXT NOT NULL,
+            post_count INTEGER NOT NULL DEFAULT 0,
+            score_sum REAL NOT NULL DEFAULT 0,
+            score_sq_sum REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (bucket, platform, sentiment_label)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS sentiment_rollup_daily (
+            bucket TEXT NOT NULL,
+            platform TEXT NOT NULL,
+            sentiment_label TEXT NOT NULL,
+            post_count INTEGER NOT NULL DEFAULT 0,
+            score_sum REAL NOT NULL DEFAULT 0,
+            score_sq_sum REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (bucket, platform, sentiment_label)
+        ) WITHOUT ROWID
+        ''',
+        *(_rollup_backfill(table, bucket) for table, bucket in ROLLUP_GRANULARITIES.values()),
+        f'''
+        CREATE TRIGGER IF NOT EXISTS posts_rollup_insert AFTER INSERT ON posts
+        BEGIN {_rollup_delta('NEW', '+')} END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS posts_rollup_delete AFTER DELETE ON posts
+        BEGIN {_rollup_delta('OLD', '-')} END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS posts_rollup_update
+        AFTER UPDATE OF platform, scraped_at, sentiment_score, sentiment_label ON posts
+        BEGIN {_rollup_delta('OLD', '-')} {_rollup_delta('NEW', '+')} END
+        ''',
+    ]),
+    (7, 'posts_engagement_index', [
+        # get_filtered_posts(order_by='likes'), dashboard top posts
+        'CREATE INDEX IF NOT EXISTS idx_posts_analyzed_likes ON posts (likes) WHERE sentiment_label IS NOT NULL',
+    ]),
+    (8, 'term_frequencies', [
+        # Word counts of analyzed posts per platform and label (dashboard word clouds)
+        '''
+        CREATE TABLE IF NOT EXISTS term_frequencies (
+            platform TEXT NOT NULL,
+            sentiment_label TEXT NOT NULL,
+            term TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (platform, sentiment_label, term)
+        ) WITHOUT ROWID
+        ''',
+        # Bumped whenever term_frequencies changes, so rendered clouds can be cached
+        '''
+        CREATE TABLE IF NOT EXISTS term_frequency_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+        ''',
+        'INSERT OR IGNORE INTO term_frequency_version (id, version) VALUES (1, 0)',
+        # Triggers queue analyzed posts entering (+1) or leaving (-1) a platform/label
+        # group; tokenizing needs Python, so the writer drains the queue afterwards
+        '''
+        CREATE TABLE IF NOT EXISTS term_frequency_queue (
+            seq INTEGER PRIMARY KEY,
+            platform TEXT NOT NULL,
+            sentiment_label TEXT NOT NULL,
+            content TEXT,
+            sign INTEGER NOT NULL
+        )
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS posts_terms_insert AFTER INSERT ON posts
+        WHEN NEW.sentiment_label IS NOT NULL
+        BEGIN {_term_queue_entry('NEW', 1)} END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS posts_terms_delete AFTER DELETE ON posts
+        WHEN OLD.sentiment_label IS NOT NULL
+        BEGIN {_term_queue_entry('OLD', -1)} END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS posts_terms_update
+        AFTER UPDATE OF platform, content, sentiment_label ON posts
+        WHEN OLD.sentiment_label IS NOT NEW.sentiment_label OR OLD.platform IS NOT NEW.platform
+            OR OLD.content IS NOT NEW.content
+        BEGIN {_term_queue_entry('OLD', -1)} {_term_queue_entry('NEW', 1)} END
+        ''',
+        # Count the posts analyzed before the table existed
+        '''
+        INSERT INTO term_frequency_queue (platform, sentiment_label, content, sign)
+        SELECT platform, sentiment_label, content, 1 FROM posts WHERE sentiment_label IS NOT NULL
+        ''',
+        lambda cursor: _drain_term_queue(cursor.connection),
+    ]),
+]
+
+# ==================== CONNECTION MANAGEMENT ====================
+
+def get_connection():
+    """
+    Return this thread's connection to DATABASE_FILE, opening it on first use
+    
+    Connections are reused for the lifetime of the thread so the page cache
+    survives between calls. A new one is opened if DATABASE_FILE or
+    READ_ONLY changes or the process has forked.
+    """
+    path = str(DATABASE_FILE)
+    conn = getattr(_local, 'conn', None)
+    
+    if (conn is None or _local.path != path or _local.pid != os.getpid()
+            or _local.read_only != READ_ONLY):
+        if READ_ONLY:
+            conn = sqlite3.connect(f"{Path(path).resolve().as_uri()}?mode=ro", uri=True, timeout=30)
+            # journal_mode is a property of the file; setting it would need a write
+            pragmas = CONNECTION_PRAGMAS[1:]
+        else:
+            conn = sqlite3.connect(path, timeout=30)
+            pragmas = CONNECTION_PRAGMAS
+        for pragma in pragmas:
+            conn.execute(pragma)
+        _local.conn = conn
+        _local.path = path
+        _local.pid = os.getpid()
+        _local.read_only = READ_ONLY
+        _local.depth = 0
+    
+    return conn
+
+def close_connection():
+    """Close this thread's connection (a new one is opened on next use)"""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and _local.pid == os.getpid():
+        conn.close()
+    _local.conn = None
+
+@contextmanager
+def transaction():
+    """
+    Run a block of statements in one write transaction
+    
+    Commits on success and rolls back on error. Nested blocks join the
+    outermost transaction, so database functions called inside one commit
+    together with it.
+    
+    Usage:
+        with transaction() as conn:
+            conn.execute(...)
+    """
+    conn = get_connection()
+    
+    if _local.depth:
+        _local.depth += 1
+        try:
+            yield conn
+        finally:
+            _local.depth -= 1
+        return
+    
+    # Only count as inside a transaction once BEGIN succeeded; a failed BEGIN
+    # (e.g. "database is locked") must not turn later blocks into nested ones
+    conn.execute('BEGIN IMMEDIATE')
+    _local.depth = 1
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
+    finally:
+        _local.depth = 0
+
+# ==================== SCHEMA ====================
+
 def create_database():
-    """Create database and tables"""
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
+    """Create database and tables, upgrading an existing schema in place"""
+    with transaction() as conn:
+        cursor = conn.cursor()
+        _create_tables(cursor)
+        _apply_migrations(cursor)
+
+def open_read_only():
+    """
+    Prepare for reading only, e.g. to show statistics
     
+    A new or outdated database is created/migrated first, which takes the
+    write lock. A current one is opened read-only instead, so reading never
+    waits behind a running scraper or analyzer.
+    
+    Returns:
+        True if connections are now read-only, False if the database was migrated
+    """
+    global READ_ONLY
+    if Path(DATABASE_FILE).exists():
+        READ_ONLY = True
+        if get_schema_version() >= MIGRATIONS[-1][0]:
+            return True
+        READ_ONLY = False
+    create_database()
+    return False
+
+def get_schema_version():
+    """Return the latest applied migration version (0 if none)"""
+    cursor = get_connection().cursor()
+    cursor.execute('''
+        SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'schema_migrations'
+    ''')
+    if cursor.fetchone() is None:
+        return 0
+    cursor.execute('SELECT COALESCE(MAX(version), 0) FROM schema_migrations')
+    return cursor.fetchone()[0]
+
+def _apply_migrations(cursor):
+    """Apply every migration newer than the recorded schema version"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('SELECT COALESCE(MAX(version), 0) FROM schema_migrations')
+    current = cursor.fetchone()[0]
+    
+    for version, name, statements in MIGRATIONS:
+        if version <= current:
+            continue
+        for statement in statements:
+            # Data migrations that need Python are given as callables
+            if callable(statement):
+                statement(cursor)
+            else:
+                cursor.execute(statement)
+        cursor.execute(
+            'INSERT INTO schema_migrations (version, name) VALUES (?, ?)',
+            (version, name)
+        )
+
+def _create_tables(cursor):
+    """Create the base tables if they do not exist yet"""
     # Social Media Posts table with sentiment analysis
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS posts (
@@ -53,188 +525,842 @@ def create_database():
             scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     ''')
-    
-    conn.commit()
-    conn.close()
 
 def insert_article(title, description, url, author, publish_date, category):
     """Insert article into database"""
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute('''
-            INSERT INTO articles (title, description, url, author, publish_date, category)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (title, description, url, author, publish_date, category))
-        conn.commit()
+        with transaction() as conn:
+            conn.execute('''
+                INSERT INTO articles (title, description, url, author, publish_date, category)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (title, description, url, author, publish_date, category))
         return True
     except sqlite3.IntegrityError:
         # URL already exists
         return False
-    finally:
-        conn.close()
 
 def insert_job(title, company, location, job_type, salary, description, url):
     """Insert job into database"""
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute('''
-            INSERT INTO jobs (title, company, location, job_type, salary, description, url)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (title, company, location, job_type, salary, description, url))
-        conn.commit()
+        with transaction() as conn:
+            conn.execute('''
+                INSERT INTO jobs (title, company, location, job_type, salary, description, url)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (title, company, location, job_type, salary, description, url))
         return True
     except sqlite3.IntegrityError:
         return False
-    finally:
-        conn.close()
 
 def get_all_articles(limit=50):
     """Retrieve all articles from database"""
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
+    cursor = get_connection().cursor()
     cursor.execute('SELECT * FROM articles ORDER BY scraped_at DESC LIMIT ?', (limit,))
-    articles = cursor.fetchall()
-    conn.close()
-    return articles
+    return cursor.fetchall()
 
 def get_articles_by_category(category, limit=50):
     """Get articles by category"""
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
+    cursor = get_connection().cursor()
     cursor.execute(
         'SELECT * FROM articles WHERE category = ? ORDER BY scraped_at DESC LIMIT ?',
         (category, limit)
     )
-    articles = cursor.fetchall()
-    conn.close()
-    return articles
+    return cursor.fetchall()
 
 def get_all_jobs(limit=50):
     """Retrieve all jobs from database"""
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
+    cursor = get_connection().cursor()
     cursor.execute('SELECT * FROM jobs ORDER BY scraped_at DESC LIMIT ?', (limit,))
-    jobs = cursor.fetchall()
-    conn.close()
-    return jobs
+    return cursor.fetchall()
 
 def get_jobs_by_type(job_type, limit=50):
     """Get jobs by type"""
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
+    cursor = get_connection().cursor()
     cursor.execute(
         'SELECT * FROM jobs WHERE job_type = ? ORDER BY scraped_at DESC LIMIT ?',
         (job_type, limit)
     )
-    jobs = cursor.fetchall()
-    conn.close()
-    return jobs
+    return cursor.fetchall()
 
 # ==================== SOCIAL MEDIA POST FUNCTIONS ====================
 
 def insert_post(platform, username, content, url, likes=0, shares=0, comments=0, post_date=None):
-    """Insert social media post into database"""
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
+    """Insert social media post into database (None if its url is already stored or it is invalid)"""
+    inserted_ids, _ = insert_posts_bulk([{
+        'platform': platform,
+        'username': username,
+        'content': content,
+        'url': url,
+        'likes': likes,
+        'shares': shares,
+        'comments': comments,
+        'post_date': post_date
+    }])
+    return inserted_ids[0] if inserted_ids else None
+
+def insert_posts_bulk(posts, dedup='link', threshold=None):
+    """
+    Insert many social media posts in a single transaction
     
-    try:
-        cursor.execute('''
-            INSERT INTO posts (platform, username, content, url, likes, shares, comments, post_date)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (platform, username, content, url, likes, shares, comments, post_date))
-        conn.commit()
-        return cursor.lastrowid
-    except sqlite3.IntegrityError:
-        return None
-    finally:
-        conn.close()
+    Posts whose url is already stored (or repeats an earlier url of the
+    batch) are skipped. Posts without a platform or content would fail the
+    NOT NULL constraints and roll back the whole batch, so they are logged
+    and skipped instead (not counted as duplicates). Every stored post is also added to the near-duplicate
+    index, and a post whose content is a near duplicate of an earlier one,
+    stored before or earlier in the same batch, is handled per `dedup`:
+    
+    - 'link': store it with canonical_id pointing at the earlier post's
+      group and copy that post's sentiment; analysis then skips it and
+      sentiment updates of the canonical post are propagated to it
+    - 'skip': do not store it (counted as a duplicate)
+    - 'keep': store it as an independent post
+    
+    Args:
+        posts: Iterable of dicts with insert_post's keyword arguments
+            (platform, username, content, url, likes, shares, comments, post_date)
+        dedup: Near-duplicate handling, one of DEDUP_MODES
+        threshold: SimHash similarity threshold (default: NEAR_DUPLICATE_THRESHOLD)
+        
+    Returns:
+        Tuple of (list of new post ids, number of duplicates skipped)
+    """
+    if dedup not in DEDUP_MODES:
+        raise ValueError(f"Unknown dedup mode: {dedup}. Use one of {DEDUP_MODES}")
+    max_distance = near_duplicates.max_distance(
+        NEAR_DUPLICATE_THRESHOLD if threshold is None else threshold
+    )
+    
+    rows = []
+    for post in posts:
+        if post.get('platform') is None or post.get('content') is None:
+            logger.warning(f"Skipping post without platform or content: {post.get('url') or post}")
+            continue
+        rows.append((
+            post['platform'],
+            post.get('username'),
+            post['content'],
+            post.get('url'),
+            post.get('likes', 0),
+            post.get('shares', 0),
+            post.get('comments', 0),
+            post.get('post_date')
+        ))
+    
+    if not rows:
+        return [], 0
+    
+    with transaction() as conn:
+        # Decide everything in Python first, then write with two executemany
+        # calls. The write lock is held from here on, so the ids handed out
+        # below are exactly the ones AUTOINCREMENT would assign.
+        stored_urls = _stored_urls(conn, [row[3] for row in rows])
+        fingerprints = [near_duplicates.simhash(row[2]) for row in rows]
+        candidates = {}
+        if dedup != 'keep':
+            candidates = _near_duplicate_candidates_bulk(
+                conn, [fingerprint for fingerprint in fingerprints if fingerprint is not None]
+            )
+        
+        next_id = conn.execute('''
+            SELECT MAX(COALESCE((SELECT MAX(id) FROM posts), 0),
+                       COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'posts'), 0)) + 1
+        ''').fetchone()[0]
+        
+        new_rows = []
+        new_fingerprints = []
+        for row, fingerprint in zip(rows, fingerprints):
+            url = row[3]
+            if url is not None and url in stored_urls:
+                continue
+            
+            canonical_id = None
+            if fingerprint is not None and dedup != 'keep':
+                canonical_id = _closest_canonical(candidates, fingerprint, max_distance)
+                if canonical_id is not None and dedup == 'skip':
+                    continue
+            
+            post_id = next_id
+            next_id += 1
+            if url is not None:
+                stored_urls.add(url)
+            new_rows.append((post_id,) + row + (canonical_id,))
+            if fingerprint is not None:
+                new_fingerprints.append((post_id, fingerprint))
+                if dedup != 'keep':
+                    # Later posts of this batch may be near duplicates of this one
+                    entry = (fingerprint, post_id, canonical_id or post_id)
+                    for band_key in enumerate(near_duplicates.bands(fingerprint)):
+                        candidates.setdefault(band_key, []).append(entry)
+        
+        # Linked duplicates copy their canonical post's sentiment (all NULL
+        # when there is none, e.g. for a canonical post from this batch)
+        conn.executemany('''
+            INSERT INTO posts (id, platform, username, content, url, likes, shares, comments,
+                               post_date, canonical_id, sentiment_score, sentiment_label, analyzed_at)
+            SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?, c.id, c.sentiment_score, c.sentiment_label, c.analyzed_at
+            FROM (SELECT 1) LEFT JOIN posts c ON c.id = ?
+        ''', new_rows)
+        conn.executemany('''
+            INSERT OR REPLACE INTO post_fingerprints (post_id, simhash, band0, band1, band2, band3)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [(post_id, near_duplicates.to_signed(fingerprint), *near_duplicates.bands(fingerprint))
+              for post_id, fingerprint in new_fingerprints])
+        
+        # Linked duplicates arrive with their canonical post's sentiment
+        _drain_term_queue(conn)
+    
+    return [row[0] for row in new_rows], len(rows) - len(new_rows)
+
+def _stored_urls(conn, urls):
+    """Return the subset of urls already stored in posts"""
+    urls = list({url for url in urls if url is not None})
+    stored = set()
+    # Stay below SQLite's bound-parameter limit
+    for start in range(0, len(urls), 500):
+        batch = urls[start:start + 500]
+        stored.update(url for url, in conn.execute(
+            f'SELECT url FROM posts WHERE url IN ({", ".join("?" * len(batch))})', batch
+        ))
+    return stored
+
+def _near_duplicate_candidates_bulk(conn, fingerprints):
+    """
+    Load every indexed post sharing a band with any of fingerprints
+    
+    Returns:
+        Dict of {(band number, band value): [(simhash, post_id, canonical_id)]}
+    """
+    band_values = [set() for _ in range(near_duplicates.BANDS)]
+    for fingerprint in fingerprints:
+        for band, value in enumerate(near_duplicates.bands(fingerprint)):
+            band_values[band].add(value)
+    
+    found = {}
+    for band, values in enumerate(band_values):
+        values = list(values)
+        for start in range(0, len(values), 500):
+            batch = values[start:start + 500]
+            cursor = conn.execute(f'''
+                SELECT f.post_id, f.simhash, COALESCE(p.canonical_id, p.id)
+                FROM post_fingerprints f JOIN posts p ON p.id = f.post_id
+                WHERE f.band{band} IN ({', '.join('?' * len(batch))})
+            ''', batch)
+            for post_id, simhash, canonical_id in cursor:
+                found[post_id] = (near_duplicates.from_signed(simhash), post_id, canonical_id)
+    
+    candidates = {}
+    for entry in sorted(found.values(), key=lambda entry: entry[1]):
+        for band_key in enumerate(near_duplicates.bands(entry[0])):
+            candidates.setdefault(band_key, []).append(entry)
+    return candidates
+
+def _closest_canonical(candidates, fingerprint, max_distance):
+    """Return the canonical post id of the closest candidate within max_distance, or None"""
+    best = None
+    for band_key in enumerate(near_duplicates.bands(fingerprint)):
+        for simhash, post_id, canonical_id in candidates.get(band_key, ()):
+            distance = near_duplicates.hamming_distance(fingerprint, simhash)
+            if distance <= max_distance and (best is None or (distance, post_id) < best[:2]):
+                best = (distance, post_id, canonical_id)
+    return best[2] if best else None
+
+def _index_fingerprint(conn, post_id, fingerprint):
+    """Add a post's SimHash to the near-duplicate index"""
+    conn.execute('''
+        INSERT OR REPLACE INTO post_fingerprints (post_id, simhash, band0, band1, band2, band3)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (post_id, near_duplicates.to_signed(fingerprint), *near_duplicates.bands(fingerprint)))
+
+def _near_duplicate_candidates(conn, fingerprint, max_distance):
+    """
+    Find indexed posts within max_distance bits of fingerprint
+    
+    Returns:
+        List of (distance, post_id, canonical_id) tuples, closest first
+    """
+    cursor = conn.execute('''
+        SELECT f.post_id, f.simhash, COALESCE(p.canonical_id, p.id)
+        FROM post_fingerprints f JOIN posts p ON p.id = f.post_id
+        WHERE f.band0 = ? OR f.band1 = ? OR f.band2 = ? OR f.band3 = ?
+    ''', near_duplicates.bands(fingerprint))
+    
+    candidates = []
+    for post_id, simhash, canonical_id in cursor.fetchall():
+        distance = near_duplicates.hamming_distance(fingerprint, near_duplicates.from_signed(simhash))
+        if distance <= max_distance:
+            candidates.append((distance, post_id, canonical_id))
+    return sorted(candidates)
+
+def _find_canonical(conn, fingerprint, max_distance):
+    """Return the canonical post id of the closest near duplicate, or None"""
+    candidates = _near_duplicate_candidates(conn, fingerprint, max_distance)
+    return candidates[0][2] if candidates else None
+
+def _index_near_duplicates(conn, threshold):
+    """Re-fingerprint every post in id order, linking each to an earlier near duplicate"""
+    max_distance = near_duplicates.max_distance(threshold)
+    conn.execute('DELETE FROM post_fingerprints')
+    conn.execute('UPDATE posts SET canonical_id = NULL WHERE canonical_id IS NOT NULL')
+    
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            'SELECT id, content FROM posts WHERE id > ? ORDER BY id LIMIT 1000', (last_id,)
+        ).fetchall()
+        if not rows:
+            break
+        for post_id, content in rows:
+            fingerprint = near_duplicates.simhash(content)
+            if fingerprint is None:
+                continue
+            canonical_id = _find_canonical(conn, fingerprint, max_distance)
+            if canonical_id is not None:
+                conn.execute('UPDATE posts SET canonical_id = ? WHERE id = ?', (canonical_id, post_id))
+            _index_fingerprint(conn, post_id, fingerprint)
+        last_id = rows[-1][0]
+    
+    # Unanalyzed duplicates inherit their canonical post's sentiment
+    conn.execute('''
+        UPDATE posts SET
+            sentiment_score = (SELECT c.sentiment_score FROM posts c WHERE c.id = posts.canonical_id),
+            sentiment_label = (SELECT c.sentiment_label FROM posts c WHERE c.id = posts.canonical_id),
+            analyzed_at = (SELECT c.analyzed_at FROM posts c WHERE c.id = posts.canonical_id)
+        WHERE canonical_id IS NOT NULL AND sentiment_label IS NULL
+    ''')
+
+def rebuild_near_duplicate_index(threshold=None):
+    """
+    Recompute every post's fingerprint and canonical link (e.g. after changing the threshold)
+    
+    Args:
+        threshold: SimHash similarity threshold (default: NEAR_DUPLICATE_THRESHOLD)
+    """
+    with transaction() as conn:
+        _index_near_duplicates(conn, NEAR_DUPLICATE_THRESHOLD if threshold is None else threshold)
+        _drain_term_queue(conn)
+
+def find_near_duplicates(content, threshold=None, limit=10):
+    """
+    Find stored posts whose content is a near duplicate of content
+    
+    Candidates are looked up by fingerprint band, so every post within
+    near_duplicates.BANDS - 1 differing bits is found; looser thresholds
+    may miss some matches.
+    
+    Args:
+        content: Text to compare against
+        threshold: SimHash similarity threshold (default: NEAR_DUPLICATE_THRESHOLD)
+        limit: Maximum number of matches
+        
+    Returns:
+        List of (post_id, similarity) tuples, most similar first
+    """
+    fingerprint = near_duplicates.simhash(content)
+    if fingerprint is None:
+        return []
+    max_distance = near_duplicates.max_distance(
+        NEAR_DUPLICATE_THRESHOLD if threshold is None else threshold
+    )
+    candidates = _near_duplicate_candidates(get_connection(), fingerprint, max_distance)
+    return [(post_id, 1 - distance / near_duplicates.FINGERPRINT_BITS)
+            for distance, post_id, _ in candidates[:limit]]
 
 def update_post_sentiment(post_id, sentiment_score, sentiment_label):
-    """Update sentiment analysis results for a post"""
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
+    """Update sentiment analysis results for a post and its linked near duplicates"""
+    update_post_sentiments_bulk([(post_id, sentiment_score, sentiment_label)])
+
+def update_post_sentiments_bulk(rows, commit_interval=None):
+    """
+    Update sentiment analysis results for many posts at once
     
-    cursor.execute('''
-        UPDATE posts 
-        SET sentiment_score = ?, sentiment_label = ?, analyzed_at = CURRENT_TIMESTAMP
-        WHERE id = ?
-    ''', (sentiment_score, sentiment_label, post_id))
+    Near duplicates linked to an updated post (canonical_id) receive the
+    same result. Word counts of posts whose label changed are moved to
+    their new group in term_frequencies.
+    
+    Args:
+        rows: Iterable of (post_id, sentiment_score, sentiment_label) tuples
+        commit_interval: Commit after this many rows (None = one transaction for all)
+        
+    Returns:
+        Number of posts updated, including linked near duplicates
+    """
+    params = [(score, label, post_id) for post_id, score, label in rows]
+    step = commit_interval or len(params) or 1
+    updated = 0
+    
+    for start in range(0, len(params), step):
+        with transaction() as conn:
+            cursor = conn.executemany('''
+                UPDATE posts 
+                SET sentiment_score = ?, sentiment_label = ?, analyzed_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', params[start:start + step])
+            updated += cursor.rowcount
+            cursor = conn.executemany('''
+                UPDATE posts 
+                SET sentiment_score = ?, sentiment_label = ?, analyzed_at = CURRENT_TIMESTAMP
+                WHERE canonical_id = ?
+            ''', params[start:start + step])
+            updated += cursor.rowcount
+            _drain_term_queue(conn)
     
-    conn.commit()
-    conn.close()
+    return updated
+
+def get_crawl_state(source):
+    """
+    Get the high-water mark of an incremental crawl
+    
+    Returns:
+        Tuple of (last_seen_utc, last_seen_id), or None if never crawled
+    """
+    cursor = get_connection().cursor()
+    cursor.execute(
+        'SELECT last_seen_utc, last_seen_id FROM crawl_state WHERE source = ?',
+        (source,)
+    )
+    return cursor.fetchone()
+
+def update_crawl_state(source, last_seen_utc, last_seen_id):
+    """Record the newest item seen by an incremental crawl of source"""
+    with transaction() as conn:
+        conn.execute('''
+            INSERT INTO crawl_state (source, last_seen_utc, last_seen_id, updated_at)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT (source) DO UPDATE SET
+                last_seen_utc = excluded.last_seen_utc,
+                last_seen_id = excluded.last_seen_id,
+                updated_at = excluded.updated_at
+        ''', (source, last_seen_utc, last_seen_id))
 
 def get_all_posts(limit=100):
     """Retrieve all posts from database"""
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
+    cursor = get_connection().cursor()
     cursor.execute('SELECT * FROM posts ORDER BY scraped_at DESC LIMIT ?', (limit,))
-    posts = cursor.fetchall()
-    conn.close()
-    return posts
+    return cursor.fetchall()
 
 def get_posts_by_platform(platform, limit=100):
     """Get posts by platform"""
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
+    cursor = get_connection().cursor()
     cursor.execute(
         'SELECT * FROM posts WHERE platform = ? ORDER BY scraped_at DESC LIMIT ?',
         (platform, limit)
     )
-    posts = cursor.fetchall()
-    conn.close()
-    return posts
+    return cursor.fetchall()
 
 def get_posts_by_sentiment(sentiment_label, limit=100):
     """Get posts by sentiment label (positive, negative, neutral)"""
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
+    cursor = get_connection().cursor()
     cursor.execute(
         'SELECT * FROM posts WHERE sentiment_label = ? ORDER BY scraped_at DESC LIMIT ?',
         (sentiment_label, limit)
     )
-    posts = cursor.fetchall()
-    conn.close()
-    return posts
+    return cursor.fetchall()
 
-def get_sentiment_statistics():
-    """Get sentiment statistics across all posts"""
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
+def count_posts(unanalyzed_only=False, canonical_only=False):
+    """
+    Count posts
     
-    cursor.execute('''
+    Args:
+        unanalyzed_only: Only count posts without a sentiment score
+        canonical_only: Leave out near duplicates linked to another post
+    """
+    conditions = []
+    if unanalyzed_only:
+        conditions.append('sentiment_score IS NULL')
+    if canonical_only:
+        conditions.append('canonical_id IS NULL')
+    
+    query = 'SELECT COUNT(*) FROM posts'
+    if conditions:
+        query += ' WHERE ' + ' AND '.join(conditions)
+    
+    cursor = get_connection().cursor()
+    cursor.execute(query)
+    return cursor.fetchone()[0]
+
+def iter_posts_for_analysis(chunk_size=1000, reanalyze=False):
+    """
+    Yield chunks of (id, content) pairs for posts that need sentiment analysis
+    
+    Pages through the table with keyset pagination on id, so memory stays
+    flat and no post is skipped regardless of table size. Near duplicates
+    linked to a canonical post are left out; they receive its result when
+    it is saved with update_post_sentiments_bulk.
+    
+    Args:
+        chunk_size: Posts per chunk
+        reanalyze: If True, include posts that already have a sentiment score
+    """
+    query = 'SELECT id, content FROM posts WHERE id > ? AND canonical_id IS NULL'
+    if not reanalyze:
+        query += ' AND sentiment_score IS NULL'
+    query += ' ORDER BY id LIMIT ?'
+    
+    last_id = 0
+    while True:
+        cursor = get_connection().cursor()
+        cursor.execute(query, (last_id, chunk_size))
+        rows = cursor.fetchall()
+        
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+def get_pending_posts(post_ids):
+    """
+    Get (id, content) of the given posts that still need sentiment analysis
+    
+    Posts that already have a score, and near duplicates that share their
+    canonical post's result, are left out.
+    """
+    post_ids = list(post_ids)
+    pending = []
+    cursor = get_connection().cursor()
+    # Stay below SQLite's bound-parameter limit
+    for start in range(0, len(post_ids), 500):
+        batch = post_ids[start:start + 500]
+        cursor.execute(f'''
+            SELECT id, content FROM posts
+            WHERE id IN ({', '.join('?' * len(batch))})
+                AND sentiment_score IS NULL AND canonical_id IS NULL
+            ORDER BY id
+        ''', batch)
+        pending += cursor.fetchall()
+    return pending
+
+def _fts_phrase_query(text):
+    """Quote each word of free text so FTS5 matches posts containing all of them literally"""
+    return ' '.join('"' + word.replace('"', '""') + '"' for word in text.split())
+
+def search_posts(query, platform=None, sentiment=None, limit=50, raw=False):
+    """
+    Full-text search over post content, best matches first
+    
+    Uses the posts_fts index and ranks by bm25, so lookups stay fast
+    however many posts are stored.
+    
+    Args:
+        query: Words that must all appear (any order, case and accent insensitive)
+        platform: Only return posts from this platform
+        sentiment: Only return posts with this sentiment label
+        limit: Maximum number of results
+        raw: Pass query to FTS5 unchanged, enabling its syntax
+            (OR, NOT, "phrases", prefix*, NEAR(...))
+        
+    Returns:
+        List of (id, platform, username, content, url, sentiment_score,
+        sentiment_label, scraped_at, rank) tuples; lower rank is better
+    """
+    match = query if raw else _fts_phrase_query(query)
+    if not match:
+        return []
+    
+    sql = '''
+        SELECT p.id, p.platform, p.username, p.content, p.url, p.sentiment_score,
+               p.sentiment_label, p.scraped_at, bm25(posts_fts) AS rank
+        FROM posts_fts
+        JOIN posts p ON p.id = posts_fts.rowid
+        WHERE posts_fts MATCH ?
+    '''
+    params = [match]
+    if platform is not None:
+        sql += ' AND p.platform = ?'
+        params.append(platform)
+    if sentiment is not None:
+        sql += ' AND p.sentiment_label = ?'
+        params.append(sentiment)
+    sql += ' ORDER BY rank LIMIT ?'
+    params.append(limit)
+    
+    cursor = get_connection().cursor()
+    cursor.execute(sql, params)
+    return cursor.fetchall()
+
+def rebuild_search_index():
+    """Rebuild the posts_fts full-text index from posts (repairs any drift)"""
+    with transaction() as conn:
+        conn.execute("INSERT INTO posts_fts (posts_fts) VALUES ('rebuild')")
+
+def get_sentiment_statistics(platform=None):
+    """
+    Get sentiment statistics across all posts (or one platform)
+    
+    Reads the trigger-maintained sentiment_stats summary (one row per
+    platform) instead of scanning posts.
+    
+    Returns:
+        Tuple of (total_posts, avg_sentiment, positive_count, negative_count, neutral_count)
+    """
+    query = '''
         SELECT 
-            COUNT(*) as total_posts,
-            AVG(sentiment_score) as avg_sentiment,
-            COUNT(CASE WHEN sentiment_label = 'positive' THEN 1 END) as positive_count,
-            COUNT(CASE WHEN sentiment_label = 'negative' THEN 1 END) as negative_count,
-            COUNT(CASE WHEN sentiment_label = 'neutral' THEN 1 END) as neutral_count
-        FROM posts
-        WHERE sentiment_label IS NOT NULL
-    ''')
+            COALESCE(SUM(total_posts), 0) as total_posts,
+            SUM(score_sum) / NULLIF(SUM(scored_posts), 0) as avg_sentiment,
+            COALESCE(SUM(positive_count), 0) as positive_count,
+            COALESCE(SUM(negative_count), 0) as negative_count,
+            COALESCE(SUM(neutral_count), 0) as neutral_count
+        FROM sentiment_stats
+    '''
+    params = ()
+    if platform is not None:
+        query += ' WHERE platform = ?'
+        params = (platform,)
+    
+    cursor = get_connection().cursor()
+    cursor.execute(query, params)
+    return cursor.fetchone()
+
+def rebuild_sentiment_stats():
+    """Recompute the sentiment_stats summary from posts (repairs any drift)"""
+    with transaction() as conn:
+        conn.execute('DELETE FROM sentiment_stats')
+        conn.execute(_SENTIMENT_STATS_BACKFILL)
+
+def _format_bucket_time(value):
+    """Format a datetime like SQLite's CURRENT_TIMESTAMP (strings pass through)"""
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return value
+
+def get_sentiment_timeline(start=None, end=None, granularity='day', platform=None, sentiment=None):
+    """
+    Get sentiment totals per time bucket from the rollup tables
+    
+    Reads the trigger-maintained hourly/daily rollups instead of scanning
+    posts, so a year of history is a few hundred rows per label.
+    
+    Args:
+        start: Include buckets from the one containing this time
+            (datetime or 'YYYY-MM-DD[ HH:MM:SS]')
+        end: Stop before the bucket containing this time (same formats)
+        granularity: 'hour' or 'day'
+        platform: Only count posts from this platform
+        sentiment: Only return this sentiment label
+        
+    Returns:
+        List of (bucket, sentiment_label, post_count, avg_score, score_stddev)
+        tuples ordered by bucket; bucket is the 'YYYY-MM-DD' day or the
+        'YYYY-MM-DD HH:00:00' hour the posts were scraped in
+    """
+    if granularity not in ROLLUP_GRANULARITIES:
+        raise ValueError(f"Unknown granularity: {granularity}. Use one of {tuple(ROLLUP_GRANULARITIES)}")
+    table, bucket = ROLLUP_GRANULARITIES[granularity]
+    
+    conditions = []
+    params = []
+    for condition, value in ((f"bucket >= {bucket.format(time='?')}", _format_bucket_time(start)),
+                             (f"bucket < {bucket.format(time='?')}", _format_bucket_time(end)),
+                             ('platform = ?', platform),
+                             ('sentiment_label = ?', sentiment)):
+        if value is not None:
+            conditions.append(condition)
+            params.append(value)
+    
+    query = f'''
+        SELECT bucket, sentiment_label, SUM(post_count), SUM(score_sum), SUM(score_sq_sum)
+        FROM {table}
+    '''
+    if conditions:
+        query += ' WHERE ' + ' AND '.join(conditions)
+    query += ' GROUP BY bucket, sentiment_label ORDER BY bucket, sentiment_label'
+    
+    cursor = get_connection().cursor()
+    cursor.execute(query, params)
+    
+    timeline = []
+    for bucket, label, count, score_sum, score_sq_sum in cursor.fetchall():
+        mean = score_sum / count
+        variance = max(score_sq_sum / count - mean * mean, 0.0)
+        timeline.append((bucket, label, count, mean, variance ** 0.5))
+    return timeline
+
+def rebuild_sentiment_rollups():
+    """Recompute the hourly and daily rollup tables from posts (repairs any drift)"""
+    with transaction() as conn:
+        for table, bucket in ROLLUP_GRANULARITIES.values():
+            conn.execute(f'DELETE FROM {table}')
+            conn.execute(_rollup_backfill(table, bucket))
+
+# ==================== WORD FREQUENCIES ====================
+
+def _drain_term_queue(conn, batch_size=1000):
+    """
+    Fold the posts queued by the posts_terms_* triggers into term_frequencies
+    
+    Every database function that writes posts calls this before committing;
+    writes made with plain SQL leave term_frequencies stale until the next one.
+    """
+    changed = False
+    while True:
+        rows = conn.execute('''
+            SELECT seq, platform, sentiment_label, content, sign
+            FROM term_frequency_queue ORDER BY seq LIMIT ?
+        ''', (batch_size,)).fetchall()
+        if not rows:
+            break
+        
+        deltas = Counter()
+        for _, platform, label, content, sign in rows:
+            for term, count in word_frequencies.count_words(content).items():
+                deltas[(platform, label, term)] += sign * count
+        
+        conn.executemany('''
+            INSERT INTO term_frequencies (platform, sentiment_label, term, count)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (platform, sentiment_label, term) DO UPDATE SET count = count + excluded.count
+        ''', [key + (count,) for key, count in deltas.items() if count])
+        conn.executemany(
+            'DELETE FROM term_frequencies WHERE platform = ? AND sentiment_label = ? AND term = ? AND count <= 0',
+            [key for key, count in deltas.items() if count < 0]
+        )
+        conn.execute('DELETE FROM term_frequency_queue WHERE seq <= ?', (rows[-1][0],))
+        changed = True
     
-    stats = cursor.fetchone()
-    conn.close()
-    return stats
+    if changed:
+        conn.execute('UPDATE term_frequency_version SET version = version + 1')
 
-    jobs = cursor.fetchall()
-    conn.close()
-    return jobs
+def get_term_frequencies(platform=None, sentiment=None, limit=200):
+    """
+    Get the most frequent words of analyzed posts
+    
+    Reads the term_frequencies store, so the cost depends on the
+    vocabulary size rather than the number of posts. Changes made with
+    plain SQL (e.g. DELETE FROM posts) are only queued by the triggers and
+    show up after the next insert_posts_bulk / update_post_sentiments_bulk /
+    rebuild_term_frequencies drains the queue.
+    
+    Args:
+        platform: Only count posts from this platform
+        sentiment: Only count posts with this sentiment label
+        limit: Maximum number of words
+        
+    Returns:
+        Dict of {word: count}, most frequent first
+    """
+    conditions = []
+    params = []
+    if platform is not None:
+        conditions.append('platform = ?')
+        params.append(platform)
+    if sentiment is not None:
+        conditions.append('sentiment_label = ?')
+        params.append(sentiment)
+    
+    query = 'SELECT term, SUM(count) AS total FROM term_frequencies'
+    if conditions:
+        query += ' WHERE ' + ' AND '.join(conditions)
+    query += ' GROUP BY term ORDER BY total DESC, term LIMIT ?'
+    params.append(limit)
+    
+    cursor = get_connection().cursor()
+    cursor.execute(query, params)
+    return dict(cursor.fetchall())
+
+def get_term_frequency_version():
+    """Return a number that changes whenever term_frequencies changes"""
+    cursor = get_connection().cursor()
+    cursor.execute('SELECT version FROM term_frequency_version WHERE id = 1')
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+def rebuild_term_frequencies():
+    """Recount term_frequencies from every analyzed post (repairs any drift)"""
+    with transaction() as conn:
+        conn.execute('DELETE FROM term_frequencies')
+        conn.execute('DELETE FROM term_frequency_queue')
+        conn.execute('''
+            INSERT INTO term_frequency_queue (platform, sentiment_label, content, sign)
+            SELECT platform, sentiment_label, content, 1 FROM posts WHERE sentiment_label IS NOT NULL
+        ''')
+        _drain_term_queue(conn)
+
+# ==================== FILTERED QUERIES ====================
+
+# Columns returned by get_filtered_posts, in order
+FILTERED_POST_COLUMNS = (
+    'id', 'platform', 'username', 'content', 'url', 'likes', 'shares', 'comments',
+    'post_date', 'scraped_at', 'sentiment_score', 'sentiment_label'
+)
+
+def _post_filter(platform=None, sentiment=None):
+    """WHERE clause and parameters selecting analyzed posts, optionally by platform/label"""
+    conditions = ['sentiment_label IS NOT NULL']
+    params = []
+    if platform is not None:
+        conditions.append('platform = ?')
+        params.append(platform)
+    if sentiment is not None:
+        conditions.append('sentiment_label = ?')
+        params.append(sentiment)
+    return ' WHERE ' + ' AND '.join(conditions), params
+
+def get_sentiment_breakdown(platform=None, sentiment=None):
+    """
+    Count analyzed posts per platform and sentiment label
+    
+    Sums the daily rollup table, so the cost depends on the number of days
+    of history, not the number of posts.
+    
+    Returns:
+        List of (platform, sentiment_label, post_count, score_sum) tuples
+    """
+    where, params = _post_filter(platform, sentiment)
+    cursor = get_connection().cursor()
+    cursor.execute(f'''
+        SELECT platform, sentiment_label, SUM(post_count), SUM(score_sum)
+        FROM {ROLLUP_GRANULARITIES['day'][0]}
+        {where}
+        GROUP BY platform, sentiment_label
+        ORDER BY platform, sentiment_label
+    ''', params)
+    return cursor.fetchall()
+
+def get_engagement_averages(platform=None, sentiment=None):
+    """
+    Average engagement of analyzed posts
+    
+    Returns:
+        Tuple of (avg_likes, avg_comments, avg_shares), None for no posts
+    """
+    where, params = _post_filter(platform, sentiment)
+    cursor = get_connection().cursor()
+    cursor.execute(f'SELECT AVG(likes), AVG(comments), AVG(shares) FROM posts{where}', params)
+    return cursor.fetchone()
+
+def get_filtered_posts(platform=None, sentiment=None, order_by='scraped_at', limit=50, offset=0):
+    """
+    Get one page of analyzed posts, newest or most liked first
+    
+    Args:
+        platform: Only return posts from this platform
+        sentiment: Only return posts with this sentiment label
+        order_by: 'scraped_at' (newest first) or 'likes' (most liked first)
+        limit: Page size (None = every matching post)
+        offset: Number of posts to skip
+        
+    Returns:
+        List of tuples with FILTERED_POST_COLUMNS
+    """
+    if order_by not in ('scraped_at', 'likes'):
+        raise ValueError(f"Unsupported order_by: {order_by}. Use 'scraped_at' or 'likes'")
+    
+    where, params = _post_filter(platform, sentiment)
+    query = f'SELECT {", ".join(FILTERED_POST_COLUMNS)} FROM posts{where} ORDER BY {order_by} DESC, id DESC'
+    if limit is not None:
+        query += ' LIMIT ? OFFSET ?'
+        params += [limit, offset]
+    
+    cursor = get_connection().cursor()
+    cursor.execute(query, params)
+    return cursor.fetchall()
 
 def delete_old_data(days=30):
     """Delete data older than specified days"""
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    cursor.execute('''
-        DELETE FROM articles 
-        WHERE datetime(scraped_at) < datetime('now', '-' || ? || ' days')
-    ''', (days,))
-    cursor.execute('''
-        DELETE FROM jobs 
-        WHERE datetime(scraped_at) < datetime('now', '-' || ? || ' days')
-    ''', (days,))
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        conn.execute('''
+            DELETE FROM articles 
+            WHERE datetime(scraped_at) < datetime('now', '-' || ? || ' days')
+        ''', (days,))
+        conn.execute('''
+            DELETE FROM jobs 
+            WHERE datetime(scraped_at) < datetime('now', '-' || ? || ' days')
+        ''', (days,))
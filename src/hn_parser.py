@@ -0,0 +1,166 @@
+"""
+Hacker News Front Page Parser
+Extracts the story rows of a Hacker News listing page together with the
+score, comment count, author and age from each story's subtext row.
+
+Two interchangeable implementations produce identical output:
+1. lxml - C parser plus targeted XPath, used whenever lxml is installed
+2. soup - BeautifulSoup with the pure-Python html.parser (fallback)
+
+Neither library is imported until the first page is parsed, so importing
+the scraper stays cheap for callers that never reach Hacker News.
+"""
+
+import re
+from functools import lru_cache
+from importlib.util import find_spec
+from typing import Dict, List, Optional
+
+PARSERS = ('lxml', 'soup')
+
+# Story rows carry the class "athing" (alongside e.g. "submission")
+_ATHING_XPATH = "//tr[contains(concat(' ', normalize-space(@class), ' '), ' athing ')]"
+_TITLE_XPATH = "./td/span[contains(concat(' ', normalize-space(@class), ' '), ' titleline ')]/a[1]"
+
+_LEADING_INT = re.compile(r'\d+')
+
+
+@lru_cache(maxsize=None)
+def _lxml_available() -> bool:
+    return find_spec('lxml') is not None
+
+
+@lru_cache(maxsize=None)
+def _utf8_parser():
+    """lxml parser for bytes input"""
+    import lxml.html
+
+    # Hacker News serves UTF-8 without a <meta charset>, which lxml would read as latin-1
+    return lxml.html.HTMLParser(encoding='utf-8')
+
+
+def default_parser() -> str:
+    """Return the fastest parser available in this environment"""
+    return 'lxml' if _lxml_available() else 'soup'
+
+
+def _int_prefix(text: str) -> int:
+    """Parse the number at the start of e.g. '123 points' (0 if there is none)"""
+    match = _LEADING_INT.match(text.strip())
+    return int(match.group()) if match else 0
+
+
+def _comment_count(link_texts: List[str]) -> int:
+    """Comment count from the subtext links ('45 comments', '1 comment', 'discuss')"""
+    for text in reversed(link_texts):
+        text = text.replace('\xa0', ' ').strip()
+        if text.endswith('comment') or text.endswith('comments'):
+            return _int_prefix(text)
+    return 0
+
+
+def _posted_at(age_title: Optional[str]) -> Optional[str]:
+    """ISO timestamp from a span.age title ('2025-10-16T07:33:20 1760600000')"""
+    if not age_title:
+        return None
+    return age_title.split()[0]
+
+
+def _story(story_id, title, url, score, comments, author, posted_at) -> Dict[str, any]:
+    return {
+        'id': story_id,
+        'title': title,
+        'url': url,
+        'score': score,
+        'comments': comments,
+        'author': author,
+        'posted_at': posted_at
+    }
+
+
+def _parse_lxml(html, limit: int) -> List[Dict[str, any]]:
+    import lxml.html
+
+    root = lxml.html.fromstring(html, parser=_utf8_parser() if isinstance(html, bytes) else None)
+    stories = []
+    for row in root.xpath(_ATHING_XPATH):
+        if len(stories) >= limit:
+            break
+        links = row.xpath(_TITLE_XPATH)
+        if not links:
+            continue
+        title_elem = links[0]
+
+        score = comments = 0
+        author = posted_at = None
+        subtext_row = row.getnext()
+        if subtext_row is not None and subtext_row.tag == 'tr':
+            for elem in subtext_row.iter('span', 'a'):
+                css = elem.get('class', '').split()
+                if 'score' in css:
+                    score = _int_prefix(elem.text_content())
+                elif 'hnuser' in css:
+                    author = elem.text_content()
+                elif 'age' in css:
+                    posted_at = _posted_at(elem.get('title'))
+            comments = _comment_count([a.text_content() for a in subtext_row.iter('a')])
+
+        stories.append(_story(row.get('id'), title_elem.text_content(), title_elem.get('href', ''),
+                              score, comments, author, posted_at))
+    return stories
+
+
+def _parse_soup(html, limit: int) -> List[Dict[str, any]]:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    stories = []
+    for row in soup.select('tr.athing'):
+        if len(stories) >= limit:
+            break
+        title_elem = row.select_one('td > span.titleline > a')
+        if not title_elem:
+            continue
+
+        score = comments = 0
+        author = posted_at = None
+        subtext_row = row.find_next_sibling('tr')
+        if subtext_row is not None:
+            score_elem = subtext_row.select_one('span.score')
+            if score_elem:
+                score = _int_prefix(score_elem.get_text())
+            author_elem = subtext_row.select_one('a.hnuser')
+            if author_elem:
+                author = author_elem.get_text()
+            age_elem = subtext_row.select_one('span.age')
+            if age_elem:
+                posted_at = _posted_at(age_elem.get('title'))
+            comments = _comment_count([a.get_text() for a in subtext_row.find_all('a')])
+
+        stories.append(_story(row.get('id'), title_elem.get_text(), title_elem.get('href', ''),
+                              score, comments, author, posted_at))
+    return stories
+
+
+def parse_hacker_news(html, limit: int = 30, parser: Optional[str] = None) -> List[Dict[str, any]]:
+    """
+    Extract the stories of a Hacker News listing page
+
+    Args:
+        html: Page body (bytes or str)
+        limit: Maximum number of stories to return
+        parser: 'lxml' or 'soup' (default: lxml when installed)
+
+    Returns:
+        List of story dicts with id, title, url (as linked, possibly relative),
+        score, comments, author and posted_at; author and posted_at are None
+        when the row has none (e.g. job postings)
+    """
+    parser = parser or default_parser()
+    if parser == 'lxml':
+        if not _lxml_available():
+            raise ImportError("lxml is not installed; use parser='soup'")
+        return _parse_lxml(html, limit)
+    if parser == 'soup':
+        return _parse_soup(html, limit)
+    raise ValueError(f"Unknown parser: {parser}. Use one of {PARSERS}")
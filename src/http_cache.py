@@ -0,0 +1,80 @@
+"""
+HTTP Validator Cache
+Remembers the ETag / Last-Modified validators of fetched pages on disk so
+the next request can be conditional. An unchanged page then comes back as
+a bodyless 304 and the scraper skips parsing it.
+"""
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+HTTP_CACHE_FILE = Path(__file__).parent / 'http_cache.db'
+
+
+class HTTPCache:
+    """SQLite-backed store of response validators, keyed by URL"""
+
+    def __init__(self, db_path=HTTP_CACHE_FILE):
+        """
+        Initialize the cache
+
+        Args:
+            db_path: SQLite file holding the validators
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS http_cache (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        self._conn.commit()
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """Return If-None-Match / If-Modified-Since headers for url (empty if unknown)"""
+        row = self.get(url)
+        headers = {}
+        if row:
+            etag, last_modified = row
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def store(self, url: str, response_headers) -> None:
+        """Remember the validators of a 200 response (no-op if it has none)"""
+        etag = response_headers.get('ETag')
+        last_modified = response_headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+
+        with self._lock:
+            self._conn.execute('''
+                INSERT OR REPLACE INTO http_cache (url, etag, last_modified, fetched_at)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ''', (url, etag, last_modified))
+            self._conn.commit()
+
+    def get(self, url: str) -> Optional[tuple]:
+        """Return the stored (etag, last_modified) for url, or None"""
+        with self._lock:
+            return self._conn.execute(
+                'SELECT etag, last_modified FROM http_cache WHERE url = ?', (url,)
+            ).fetchone()
+
+    def clear(self):
+        """Forget every stored validator"""
+        with self._lock:
+            self._conn.execute('DELETE FROM http_cache')
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,182 @@
+"""
+Background Scrape-and-Analyze Jobs
+Runs "scrape a subreddit, then score what was new" jobs on a worker thread
+inside the current process (e.g. the Streamlit server). The scraper and one
+analyzers come from the process-wide registry, so they are built once and
+reused by every job, and only the posts a job inserted are analyzed.
+"""
+
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+try:
+    from .analyzer_registry import get_analyzer
+    from .database import get_pending_posts, update_post_sentiments_bulk
+    from .sentiment_analyzer import SentimentAnalyzer
+    from .sentiment_cache import CACHE_FILE
+except ImportError:
+    from analyzer_registry import get_analyzer
+    from database import get_pending_posts, update_post_sentiments_bulk
+    from sentiment_analyzer import SentimentAnalyzer
+    from sentiment_cache import CACHE_FILE
+
+logger = logging.getLogger(__name__)
+
+# Share of a job's progress bar taken by the scraping step
+SCRAPE_PROGRESS = 0.5
+
+# Finished jobs are kept this long (seconds) so sessions can show their
+# outcome, and never more than MAX_FINISHED_JOBS of them
+FINISHED_JOB_TTL = 600
+MAX_FINISHED_JOBS = 20
+
+
+class ScrapeJob:
+    """Status of one scrape-and-analyze job, updated live by the worker thread"""
+
+    def __init__(self, job_id: int, subreddit: str, limit: int, method: str):
+        self.id = job_id
+        self.subreddit = subreddit
+        self.limit = limit
+        self.method = method
+        self.status = 'queued'  # queued, scraping, analyzing, done, failed
+        self.message = 'Waiting for the previous job to finish...'
+        self.progress = 0.0
+        self.new_post_ids = []
+        self.analyzed = 0
+        self.errors = 0
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ('done', 'failed')
+
+
+class JobRunner:
+    """Single-threaded in-process queue of scrape-and-analyze jobs"""
+
+    def __init__(self, batch_size=32, use_cache=True, scraper_options=None):
+        """
+        Initialize the runner
+
+        Args:
+            batch_size: Posts scored together by batch_analyze
+            use_cache: If True, analyzers reuse scores via the persistent cache
+            scraper_options: Keyword arguments for the shared SocialMediaScraper
+        """
+        self.batch_size = batch_size
+        self.use_cache = use_cache
+        self.scraper_options = scraper_options or {}
+        # One worker: jobs run in submission order and never write concurrently
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='scrape-job')
+        self._jobs: Dict[int, ScrapeJob] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._scraper = None
+
+    def submit(self, subreddit: str, limit: int = 25, method: str = 'vader') -> ScrapeJob:
+        """Queue a job and return its live status object"""
+        with self._lock:
+            self._prune()
+            job = ScrapeJob(next(self._ids), subreddit, limit, method)
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id: int) -> Optional[ScrapeJob]:
+        """Return a job by id (None if unknown or already pruned)"""
+        return self._jobs.get(job_id)
+
+    def _prune(self):
+        """Forget finished jobs past FINISHED_JOB_TTL, keeping at most MAX_FINISHED_JOBS"""
+        now = time.time()
+        finished = sorted((job for job in self._jobs.values() if job.finished_at is not None),
+                          key=lambda job: job.finished_at)
+        for index, job in enumerate(finished):
+            if now - job.finished_at > FINISHED_JOB_TTL or index < len(finished) - MAX_FINISHED_JOBS:
+                del self._jobs[job.id]
+
+    def warm_up(self, method: str = 'vader'):
+        """Build the scraper and the method's analyzer in the background"""
+        def build():
+            try:
+                self._get_scraper()
+                self._get_analyzer(method)
+            except Exception as e:
+                logger.error(f"Warm-up failed: {e}")
+        self._executor.submit(build)
+
+    def shutdown(self):
+        """Finish queued jobs and stop the worker thread"""
+        self._executor.shutdown()
+
+    def _get_scraper(self):
+        if self._scraper is None:
+            # Imported here so requests/bs4 load on the worker thread (e.g. during
+            # warm_up), not while the importing page is rendering
+            try:
+                from .social_scraper import SocialMediaScraper
+            except ImportError:
+                from social_scraper import SocialMediaScraper
+            self._scraper = SocialMediaScraper(**self.scraper_options)
+        return self._scraper
+
+    def _get_analyzer(self, method: str) -> SentimentAnalyzer:
+        return get_analyzer(method, self.batch_size, CACHE_FILE if self.use_cache else None)
+
+    def _run(self, job: ScrapeJob):
+        """Scrape the subreddit, then score only the posts this job inserted"""
+        try:
+            job.status = 'scraping'
+            job.message = f"Scraping r/{job.subreddit}..."
+            job.progress = 0.05
+            scraper = self._get_scraper()
+
+            def scraped(fetched, limit):
+                job.progress = 0.05 + (SCRAPE_PROGRESS - 0.05) * min(fetched / limit, 1.0)
+                job.message = f"Scraping r/{job.subreddit}... ({fetched}/{limit} posts)"
+
+            job.new_post_ids = asyncio.run(scraper.crawl_reddit(job.subreddit, job.limit, progress=scraped))
+
+            pending = get_pending_posts(job.new_post_ids)
+            job.status = 'analyzing'
+            job.message = f"Analyzing {len(pending)} new posts..."
+            job.progress = SCRAPE_PROGRESS
+            analyzer = self._get_analyzer(job.method)
+
+            for start in range(0, len(pending), self.batch_size):
+                batch = pending[start:start + self.batch_size]
+                results = analyzer.batch_analyze([content for _, content in batch])
+
+                rows = []
+                for (post_id, _), result in zip(batch, results):
+                    if 'error' in result:
+                        logger.error(f"Error analyzing post {post_id}: {result['error']}")
+                        job.errors += 1
+                    else:
+                        rows.append((post_id, result['score'], result['label']))
+                update_post_sentiments_bulk(rows)
+
+                job.analyzed += len(rows)
+                done = start + len(batch)
+                job.progress = SCRAPE_PROGRESS + (1 - SCRAPE_PROGRESS) * done / len(pending)
+                job.message = f"Analyzed {done}/{len(pending)} new posts..."
+
+            job.message = (f"Scraped {len(job.new_post_ids)} new posts from r/{job.subreddit}, "
+                           f"analyzed {job.analyzed}")
+            job.progress = 1.0
+            job.status = 'done'
+        except Exception as e:
+            logger.error(f"Job {job.id} (r/{job.subreddit}) failed: {e}")
+            job.error = str(e)
+            job.message = f"Failed: {e}"
+            job.status = 'failed'
+        finally:
+            job.finished_at = time.time()
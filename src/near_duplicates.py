@@ -0,0 +1,95 @@
+"""
+Near-Duplicate Fingerprints
+64-bit SimHash fingerprints of post text. Texts that differ only in URLs,
+mentions, casing, punctuation or a few words get fingerprints that differ
+in only a few bits, so near duplicates are found by Hamming distance.
+
+Fingerprints are split into BANDS 16-bit bands for indexing: two
+fingerprints within BANDS - 1 bits of each other always share at least one
+band exactly, so an equality lookup on the bands finds every candidate.
+"""
+
+import hashlib
+import re
+from collections import Counter
+from typing import List, Optional
+
+FINGERPRINT_BITS = 64
+BANDS = 4
+BAND_BITS = FINGERPRINT_BITS // BANDS
+
+# Minimum fraction of equal fingerprint bits for two posts to count as
+# near duplicates (0.95 tolerates 3 differing bits of 64)
+DEFAULT_THRESHOLD = 0.95
+
+_NOISE_PATTERN = re.compile(r'http\S+|www\.\S+|@\w+')
+_WORD_PATTERN = re.compile(r'\w+')
+
+_MASK = (1 << FINGERPRINT_BITS) - 1
+_BAND_MASK = (1 << BAND_BITS) - 1
+
+
+def _features(text: str) -> Counter:
+    """Word bigrams of the normalized text (single words for one-word texts)"""
+    words = _WORD_PATTERN.findall(_NOISE_PATTERN.sub(' ', text.lower()))
+    if len(words) < 2:
+        return Counter(words)
+    return Counter(f"{a} {b}" for a, b in zip(words, words[1:]))
+
+
+def simhash(text: str) -> Optional[int]:
+    """
+    Compute the SimHash fingerprint of text
+
+    Returns:
+        Unsigned 64-bit fingerprint, or None if the text has no words
+        (e.g. only a URL) and so cannot be compared meaningfully
+    """
+    features = _features(text or '')
+    if not features:
+        return None
+
+    # Bit-column vote: each bit is set if most (weighted) features set it
+    rows = []
+    for feature, count in features.items():
+        digest = hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest()
+        rows.extend([format(int.from_bytes(digest, 'big'), '064b')] * count)
+
+    bits = ''.join(rows)
+    half = len(rows) / 2
+    fingerprint = 0
+    for bit in range(FINGERPRINT_BITS):
+        fingerprint = fingerprint << 1 | (bits[bit::FINGERPRINT_BITS].count('1') > half)
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two fingerprints"""
+    return bin((a ^ b) & _MASK).count('1')
+
+
+def similarity(a: int, b: int) -> float:
+    """Fraction of equal bits between two fingerprints (1.0 = identical)"""
+    return 1 - hamming_distance(a, b) / FINGERPRINT_BITS
+
+
+def max_distance(threshold: float) -> int:
+    """Largest Hamming distance still meeting a similarity threshold"""
+    if not 0 < threshold <= 1:
+        raise ValueError(f"Similarity threshold must be in (0, 1], got {threshold}")
+    return int((1 - threshold) * FINGERPRINT_BITS + 1e-9)
+
+
+def bands(fingerprint: int) -> List[int]:
+    """Split a fingerprint into BANDS index keys"""
+    return [fingerprint >> (band * BAND_BITS) & _BAND_MASK for band in range(BANDS)]
+
+
+def to_signed(fingerprint: int) -> int:
+    """Map an unsigned fingerprint onto SQLite's signed 64-bit INTEGER"""
+    return fingerprint - (1 << FINGERPRINT_BITS) if fingerprint >> (FINGERPRINT_BITS - 1) else fingerprint
+
+
+def from_signed(value: int) -> int:
+    """Inverse of to_signed"""
+    return value & _MASK
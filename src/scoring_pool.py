@@ -0,0 +1,131 @@
+"""
+Multi-process Scoring Pool
+VADER and TextBlob are pure Python and GIL-bound, so a single process only
+ever uses one core. ScoringPool spreads chunks of (post_id, content) pairs
+over worker processes, each of which builds its SentimentAnalyzer once.
+"""
+
+import logging
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Tuple
+
+try:
+    from .sentiment_analyzer import SentimentAnalyzer
+    from .sentiment_cache import SentimentCache
+except ImportError:
+    from sentiment_analyzer import SentimentAnalyzer
+    from sentiment_cache import SentimentCache
+
+logger = logging.getLogger(__name__)
+
+# Analyzer owned by the current worker process (set by _init_worker)
+_worker_analyzer = None
+
+
+def _init_worker(method, batch_size, cache_path, analyzer_options):
+    """Build the per-process analyzer once, when the worker starts"""
+    global _worker_analyzer
+    cache = SentimentCache(db_path=cache_path) if cache_path else None
+    _worker_analyzer = SentimentAnalyzer(method=method, batch_size=batch_size, cache=cache, **analyzer_options)
+
+
+def _ping():
+    """No-op task used to surface worker initialization errors early"""
+    return os.getpid()
+
+
+def _score_chunk(chunk):
+    """Score one chunk of (post_id, content) pairs inside a worker"""
+    results = _worker_analyzer.batch_analyze([content for _, content in chunk])
+    return [(post_id, result) for (post_id, _), result in zip(chunk, results)]
+
+
+class ScoringPool:
+    """Process pool that scores chunks of posts in parallel, preserving order"""
+
+    def __init__(self, method='vader', workers=None, batch_size=32, cache_path=None, **analyzer_options):
+        """
+        Initialize the pool
+
+        Args:
+            method: Sentiment analysis method used by every worker
+            workers: Number of worker processes (default: CPU count)
+            batch_size: Batch size of each worker's analyzer
+            cache_path: SQLite file shared by the workers' caches (None = no cache)
+            **analyzer_options: Further SentimentAnalyzer options for every worker
+                (e.g. vader_engine='numpy')
+        """
+        self.method = method
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.cache_path = cache_path
+        self.analyzer_options = analyzer_options
+        self._executor = None
+
+    def start(self):
+        """Spawn the workers and wait until they have built their analyzers"""
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.method, self.batch_size, self.cache_path, self.analyzer_options)
+        )
+        try:
+            # Fails fast (BrokenProcessPool) if the analyzer can't be built
+            self._executor.submit(_ping).result()
+        except Exception:
+            self._executor.shutdown()
+            raise
+        logger.info(f"Scoring pool started with {self.workers} {self.method.upper()} workers")
+        return self
+
+    def close(self):
+        """Shut the workers down"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def imap(self, chunks: Iterable[List[Tuple[int, str]]]) -> Iterator[List[Tuple[int, dict]]]:
+        """
+        Score chunks in parallel, yielding results in input order
+
+        At most two chunks per worker are in flight, so chunks may come from a
+        lazy generator without being materialized up front. If a whole chunk
+        fails (e.g. a worker dies) each of its posts gets an 'error' result.
+
+        Args:
+            chunks: Iterable of lists of (post_id, content) pairs
+
+        Yields:
+            List of (post_id, result) pairs for each chunk
+        """
+        in_flight = deque()
+        chunks = iter(chunks)
+
+        def submit_next():
+            chunk = next(chunks, None)
+            if chunk is None:
+                return False
+            in_flight.append((chunk, self._executor.submit(_score_chunk, chunk)))
+            return True
+
+        while len(in_flight) < self.workers * 2 and submit_next():
+            pass
+
+        while in_flight:
+            chunk, future = in_flight.popleft()
+            try:
+                scored = future.result()
+            except Exception as e:
+                logger.error(f"Error scoring chunk of {len(chunk)} posts: {e}")
+                scored = [(post_id, {'score': 0.0, 'label': 'neutral', 'error': str(e)})
+                          for post_id, _ in chunk]
+            submit_next()
+            yield scored
@@ -7,25 +7,92 @@ Supports multiple sentiment analysis methods:
 """
 
 import logging
+import threading
 from typing import Dict, Tuple
 import re
+try:
+    from .sentiment_cache import make_cache_key
+except ImportError:
+    from sentiment_cache import make_cache_key
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+TRANSFORMERS_MODEL = "cardiffnlp/twitter-roberta-base-sentiment-latest"
+
+# Everything preprocess_text strips, matched in one scan: URLs, @mentions and '#'.
+# A mention stops where a URL begins so "@userhttp://x" behaves as if URLs
+# were removed first, matching the original one-pattern-at-a-time cleanup.
+STRIP_PATTERN = re.compile(r'http\S+|www.\S+|@(?:(?!http\S|www.\S)\w)+|#')
+
+# Distribution providing each method, used to version cached results
+METHOD_PACKAGES = {
+    'vader': 'vaderSentiment',
+    'textblob': 'textblob',
+}
+
+# VADER implementations: vaderSentiment itself, or the batch-vectorized
+# engine in vader_engine.py (same scores, several times the throughput)
+VADER_ENGINES = ('reference', 'numpy')
+
+
+def preprocess_text(text: str) -> str:
+    """
+    Clean and preprocess text for analysis
+    
+    Removes URLs and @mentions, drops '#' from hashtags (keeping the
+    text) and collapses whitespace, in a single regex pass.
+    """
+    if not text:
+        return ""
+    
+    return ' '.join(STRIP_PATTERN.sub('', text).split())
+
+
+def preprocess_batch(texts: list) -> list:
+    """Preprocess a list of texts, returning cleaned texts in the same order"""
+    strip = STRIP_PATTERN.sub
+    return [' '.join(strip('', text).split()) if text else "" for text in texts]
+
+
 class SentimentAnalyzer:
     """Multi-model sentiment analyzer for social media posts"""
     
-    def __init__(self, method='vader'):
+    def __init__(self, method='vader', batch_size=32, cache=None, vader_engine='reference',
+                 transformers_backend='pytorch', model_dir=None, truncation='head'):
         """
         Initialize sentiment analyzer
         
         Args:
             method: 'vader', 'textblob', or 'transformers'
+            batch_size: Number of texts scored per forward pass in batch_analyze
+            cache: Optional SentimentCache consulted before scoring
+            vader_engine: 'reference' (vaderSentiment) or 'numpy' (vectorized
+                batch scoring with the same results); only used by 'vader'
+            transformers_backend: 'pytorch' (fp32), 'quantized' (dynamic int8) or
+                'onnx' (ONNX Runtime); only used by 'transformers'
+            model_dir: Local directory holding a saved copy of the transformers
+                model, loaded without network access (default: download/cache
+                TRANSFORMERS_MODEL from the Hugging Face Hub)
+            truncation: How the transformers method cuts texts longer than the
+                model's input: 'head' (keep the start) or 'head_tail' (keep the
+                start and the end)
         """
+        if vader_engine not in VADER_ENGINES:
+            raise ValueError(f"Unknown VADER engine: {vader_engine}. Use one of {VADER_ENGINES}")
         self.method = method
+        self.batch_size = batch_size
+        self.cache = cache
+        self.vader_engine = vader_engine
+        self.transformers_backend = transformers_backend
+        self.model_dir = model_dir
+        self.truncation = truncation
+        # Lexicon scorers are stateless; model forward passes are serialized so
+        # one instance can be shared between threads (see analyzer_registry)
+        self._model_lock = threading.Lock()
         self._initialize_analyzer()
+        self.model_version = self._get_model_version()
     
     def _initialize_analyzer(self):
         """Initialize the selected sentiment analysis method"""
@@ -33,7 +100,13 @@ class SentimentAnalyzer:
             if self.method == 'vader':
                 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
                 self.analyzer = SentimentIntensityAnalyzer()
-                logger.info("VADER sentiment analyzer initialized")
+                if self.vader_engine == 'numpy':
+                    try:
+                        from .vader_engine import VectorizedVader
+                    except ImportError:
+                        from vader_engine import VectorizedVader
+                    self.analyzer = VectorizedVader(self.analyzer)
+                logger.info(f"VADER sentiment analyzer initialized ({self.vader_engine} engine)")
                 
             elif self.method == 'textblob':
                 from textblob import TextBlob
@@ -41,34 +114,48 @@ class SentimentAnalyzer:
                 logger.info("TextBlob sentiment analyzer initialized")
                 
             elif self.method == 'transformers':
-                from transformers import pipeline
-                self.analyzer = pipeline("sentiment-analysis", 
-                                       model="cardiffnlp/twitter-roberta-base-sentiment-latest")
-                logger.info("Transformer sentiment analyzer initialized")
+                try:
+                    from .transformer_backends import TransformerModel
+                except ImportError:
+                    from transformer_backends import TransformerModel
+                self.analyzer = TransformerModel(
+                    str(self.model_dir) if self.model_dir else TRANSFORMERS_MODEL,
+                    backend=self.transformers_backend,
+                    local_files_only=self.model_dir is not None,
+                    truncation=self.truncation
+                )
+                logger.info(f"Transformer sentiment analyzer initialized ({self.transformers_backend} backend)")
             else:
                 raise ValueError(f"Unknown method: {self.method}")
         except ImportError as e:
             logger.error(f"Failed to import required library: {e}")
             raise
     
+    def _get_model_version(self) -> str:
+        """Identify the model behind this method so cached scores never go stale"""
+        if self.method == 'transformers':
+            # Quantized and ONNX scores differ slightly from fp32, and every
+            # truncation strategy scores long posts differently (including the
+            # character cut used before inputs were truncated by tokens), so
+            # all of them are cached apart
+            version = TRANSFORMERS_MODEL
+            if self.transformers_backend != 'pytorch':
+                version += f"+{self.transformers_backend}"
+            return f"{version}+tok-{self.truncation}"
+        
+        try:
+            from importlib.metadata import version
+            return f"{METHOD_PACKAGES[self.method]}-{version(METHOD_PACKAGES[self.method])}"
+        except Exception:
+            return METHOD_PACKAGES[self.method]
+    
     def preprocess_text(self, text: str) -> str:
         """Clean and preprocess text for analysis"""
-        if not text:
-            return ""
-        
-        # Remove URLs
-        text = re.sub(r'http\S+|www.\S+', '', text)
-        
-        # Remove mentions (@username)
-        text = re.sub(r'@\w+', '', text)
-        
-        # Remove hashtags (keep the text, remove #)
-        text = re.sub(r'#', '', text)
-        
-        # Remove extra whitespace
-        text = ' '.join(text.split())
-        
-        return text.strip()
+        return preprocess_text(text)
+    
+    def preprocess_batch(self, texts: list) -> list:
+        """Clean and preprocess a list of texts, preserving order"""
+        return preprocess_batch(texts)
     
     def analyze(self, text: str) -> Dict[str, any]:
         """
@@ -89,16 +176,29 @@ class SentimentAnalyzer:
         if not clean_text:
             return {'score': 0.0, 'label': 'neutral', 'confidence': 0.0}
         
+        if self.cache is not None:
+            key = make_cache_key(self.method, self.model_version, clean_text)
+            result = self.cache.get(key)
+            if result is not None:
+                return result
+        
         if self.method == 'vader':
-            return self._analyze_vader(clean_text)
+            result = self._analyze_vader(clean_text)
         elif self.method == 'textblob':
-            return self._analyze_textblob(clean_text)
+            result = self._analyze_textblob(clean_text)
         elif self.method == 'transformers':
-            return self._analyze_transformers(clean_text)
+            result = self._analyze_transformers(clean_text)
+        
+        if self.cache is not None:
+            self.cache.put(key, result)
+        return result
     
     def _analyze_vader(self, text: str) -> Dict[str, any]:
         """Analyze using VADER"""
-        scores = self.analyzer.polarity_scores(text)
+        return self._vader_result(self.analyzer.polarity_scores(text))
+    
+    def _vader_result(self, scores: Dict[str, float]) -> Dict[str, any]:
+        """Map VADER polarity scores onto the common result format"""
         compound = scores['compound']
         
         # Classify sentiment based on compound score
@@ -141,12 +241,11 @@ class SentimentAnalyzer:
     
     def _analyze_transformers(self, text: str) -> Dict[str, any]:
         """Analyze using Transformer model"""
-        # Truncate text if too long (max 512 tokens for most models)
-        max_length = 500
-        if len(text) > max_length:
-            text = text[:max_length]
-        
-        result = self.analyzer(text)[0]
+        raw_label, confidence = self._forward_transformers(self.analyzer.encode([text]))[0]
+        return self._transformers_result(raw_label, confidence)
+    
+    def _transformers_result(self, raw_label: str, confidence: float) -> Dict[str, any]:
+        """Map a raw model label and its probability onto the common result format"""
         label_map = {
             'LABEL_0': 'negative',
             'LABEL_1': 'neutral', 
@@ -156,9 +255,7 @@ class SentimentAnalyzer:
             'positive': 'positive'
         }
         
-        raw_label = result['label']
         label = label_map.get(raw_label, raw_label.lower())
-        confidence = result['score']
         
         # Convert to score (-1 to 1 scale)
         score_map = {'negative': -confidence, 'neutral': 0, 'positive': confidence}
@@ -171,32 +268,175 @@ class SentimentAnalyzer:
             'method': 'transformers'
         }
     
-    def batch_analyze(self, texts: list) -> list:
+    def batch_analyze(self, texts: list, batch_size: int = None) -> list:
         """
         Analyze multiple texts at once
         
+        The whole input is preprocessed up front; empty texts short-circuit
+        to a neutral result, and texts already in the cache (or repeated within
+        the input) are scored only once. For the transformers method texts are
+        tokenized up front and batched by length, each batch scored in a single
+        forward pass padded only as far as its longest member. A failure only marks the
+        offending texts with an 'error' key, the rest of the batch is still scored.
+        
         Args:
             texts: List of text strings
+            batch_size: Texts per forward pass (defaults to self.batch_size)
             
         Returns:
-            List of sentiment results
+            List of sentiment results, in the same order as texts
         """
-        results = []
-        for text in texts:
-            try:
-                result = self.analyze(text)
-                results.append(result)
-            except Exception as e:
-                logger.error(f"Error analyzing text: {e}")
-                results.append({'score': 0.0, 'label': 'neutral', 'error': str(e)})
+        batch_size = batch_size or self.batch_size
+        results = [None] * len(texts)
+        pending = []
+        # clean_text -> indices of every input that normalizes to it
+        duplicates = {}
+        
+        try:
+            clean_texts = self.preprocess_batch(texts)
+        except Exception:
+            # Some input isn't a string; clean item by item to isolate it
+            clean_texts = []
+            for i, text in enumerate(texts):
+                try:
+                    clean_texts.append(self.preprocess_text(text))
+                except Exception as e:
+                    logger.error(f"Error preprocessing text: {e}")
+                    results[i] = self._error_result(e)
+                    clean_texts.append(None)
+        
+        for i, clean_text in enumerate(clean_texts):
+            if clean_text is None:
+                continue
+            if not clean_text:
+                results[i] = {'score': 0.0, 'label': 'neutral', 'confidence': 0.0}
+            elif clean_text in duplicates:
+                duplicates[clean_text].append(i)
+            else:
+                duplicates[clean_text] = [i]
+                pending.append((i, clean_text))
+        
+        if self.cache is not None:
+            misses = []
+            for i, clean_text in pending:
+                result = self.cache.get(make_cache_key(self.method, self.model_version, clean_text))
+                if result is None:
+                    misses.append((i, clean_text))
+                else:
+                    results[i] = result
+            pending = misses
+        
+        if self.method == 'transformers':
+            self._score_transformers_pending(pending, results, batch_size)
+        else:
+            for start in range(0, len(pending), batch_size):
+                batch = pending[start:start + batch_size]
+                if self.method == 'vader' and self.vader_engine == 'numpy':
+                    self._score_vader_batch(batch, results)
+                    continue
+                for i, clean_text in batch:
+                    try:
+                        if self.method == 'vader':
+                            results[i] = self._analyze_vader(clean_text)
+                        else:
+                            results[i] = self._analyze_textblob(clean_text)
+                    except Exception as e:
+                        logger.error(f"Error analyzing text: {e}")
+                        results[i] = self._error_result(e)
+        
+        if self.cache is not None:
+            self.cache.put_many(
+                (make_cache_key(self.method, self.model_version, clean_text), results[i])
+                for i, clean_text in pending
+            )
+        
+        for indices in duplicates.values():
+            for i in indices[1:]:
+                results[i] = dict(results[indices[0]])
         
         return results
-
+    
+    def _score_vader_batch(self, batch: list, results: list):
+        """Score (index, clean_text) pairs in one call to the vectorized VADER engine"""
+        try:
+            scores = self.analyzer.polarity_scores_batch([text for _, text in batch])
+        except Exception as e:
+            logger.error(f"Error analyzing batch, scoring texts one by one: {e}")
+            for i, clean_text in batch:
+                try:
+                    results[i] = self._analyze_vader(clean_text)
+                except Exception as e:
+                    logger.error(f"Error analyzing text: {e}")
+                    results[i] = self._error_result(e)
+            return
+        
+        for (i, _), text_scores in zip(batch, scores):
+            results[i] = self._vader_result(text_scores)
+    
+    def _score_transformers_pending(self, pending: list, results: list, batch_size: int):
+        """Tokenize (index, clean_text) pairs and score them in batches of similar length"""
+        try:
+            from .transformer_backends import length_batches
+        except ImportError:
+            from transformer_backends import length_batches
+        
+        try:
+            encoded = self.analyzer.encode([text for _, text in pending])
+        except Exception:
+            # Find the text the tokenizer rejects; the others are still scored
+            encoded = []
+            for i, clean_text in pending:
+                try:
+                    encoded.append(self.analyzer.encode([clean_text])[0])
+                except Exception as e:
+                    logger.error(f"Error tokenizing text: {e}")
+                    results[i] = self._error_result(e)
+                    encoded.append(None)
+        
+        items = [(i, ids) for (i, _), ids in zip(pending, encoded) if ids is not None]
+        # Results are written back by index, so scoring out of order is safe
+        for positions in length_batches([ids for _, ids in items], batch_size):
+            self._score_transformers_batch([items[position] for position in positions], results)
+    
+    def _score_transformers_batch(self, batch: list, results: list):
+        """
+        Score (index, token_ids) pairs with one padded forward pass
+        
+        If the pass fails the batch is split in half and retried, so a bad
+        input is isolated in O(log n) passes instead of rescoring item by item.
+        """
+        try:
+            outputs = self._forward_transformers([ids for _, ids in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                logger.error(f"Error analyzing text: {e}")
+                results[batch[0][0]] = self._error_result(e)
+                return
+            middle = len(batch) // 2
+            self._score_transformers_batch(batch[:middle], results)
+            self._score_transformers_batch(batch[middle:], results)
+            return
+        
+        for (i, _), (raw_label, confidence) in zip(batch, outputs):
+            results[i] = self._transformers_result(raw_label, confidence)
+    
+    def _forward_transformers(self, batch: list) -> list:
+        """Run the model once over a batch of token ids, returning (raw_label, probability) pairs"""
+        with self._model_lock:
+            return self.analyzer.predict_encoded(batch)
+    
+    @staticmethod
+    def _error_result(error: Exception) -> Dict[str, any]:
+        """Neutral placeholder result for a text that could not be scored"""
+        return {'score': 0.0, 'label': 'neutral', 'error': str(error)}
 
 def analyze_post(content: str, method='vader') -> Tuple[float, str]:
     """
     Quick function to analyze a single post
     
+    Uses the process-wide shared analyzer for the method, so the model is
+    only loaded by the first call.
+    
     Args:
         content: Post content
         method: Analysis method ('vader', 'textblob', 'transformers')
@@ -204,7 +444,11 @@ def analyze_post(content: str, method='vader') -> Tuple[float, str]:
     Returns:
         Tuple of (score, label)
     """
-    analyzer = SentimentAnalyzer(method=method)
+    try:
+        from .analyzer_registry import get_analyzer
+    except ImportError:
+        from analyzer_registry import get_analyzer
+    analyzer = get_analyzer(method)
     result = analyzer.analyze(content)
     return result['score'], result['label']
 
@@ -0,0 +1,150 @@
+"""
+Sentiment Result Cache
+Stores scored results keyed on (method, model version, normalized text hash)
+so duplicate content (reposts, crossposts, bot spam) is never re-scored.
+
+Two tiers:
+1. In-memory LRU - fast, per process
+2. SQLite (optional) - persistent, stored next to scraped_data.db
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILE = Path(__file__).parent / 'sentiment_cache.db'
+
+
+def make_cache_key(method: str, model_version: str, text: str) -> Tuple[str, str, str]:
+    """Build a cache key from the method, model version and normalized text"""
+    text_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+    return (method, model_version, text_hash)
+
+
+class SentimentCache:
+    """Two-tier (memory LRU + optional SQLite) cache of sentiment results"""
+
+    def __init__(self, max_size=10000, db_path=None):
+        """
+        Initialize the cache
+
+        Args:
+            max_size: Maximum number of results kept in the in-memory tier
+            db_path: SQLite file for the persistent tier (None = memory only)
+        """
+        self.max_size = max_size
+        self.db_path = db_path
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._closed = False
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if db_path is not None:
+            self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS sentiment_cache (
+                    method TEXT NOT NULL,
+                    model_version TEXT NOT NULL,
+                    text_hash TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (method, model_version, text_hash)
+                )
+            ''')
+            self._conn.commit()
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[Dict[str, any]]:
+        """Return a copy of the cached result for key, or None on a miss (always, once closed)"""
+        with self._lock:
+            if self._closed:
+                return None
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return dict(result)
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    'SELECT result FROM sentiment_cache WHERE method = ? AND model_version = ? AND text_hash = ?',
+                    key
+                ).fetchone()
+                if row:
+                    result = json.loads(row[0])
+                    self._remember(key, result)
+                    self.disk_hits += 1
+                    return dict(result)
+
+            self.misses += 1
+            return None
+
+    def put(self, key: Tuple[str, str, str], result: Dict[str, any]):
+        """Store a result (results carrying an 'error' are never cached)"""
+        self.put_many([(key, result)])
+
+    def put_many(self, items):
+        """Store several (key, result) pairs with a single commit (ignored once closed)"""
+        items = [(key, result) for key, result in items if 'error' not in result]
+        if not items:
+            return
+
+        with self._lock:
+            if self._closed:
+                return
+            for key, result in items:
+                self._remember(key, dict(result))
+            if self._conn is not None:
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO sentiment_cache (method, model_version, text_hash, result) VALUES (?, ?, ?, ?)',
+                    [key + (json.dumps(result),) for key, result in items]
+                )
+                self._conn.commit()
+
+    def _remember(self, key, result):
+        """Insert into the memory tier, evicting the least recently used entry"""
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current memory tier size"""
+        return {
+            'hits': self.hits,
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'memory_size': len(self._memory)
+        }
+
+    def clear(self):
+        """Drop every cached result from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute('DELETE FROM sentiment_cache')
+                self._conn.commit()
+
+    def close(self):
+        """Close the persistent tier and drop the memory tier; later gets miss and puts are ignored"""
+        with self._lock:
+            self._closed = True
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -3,14 +3,19 @@ Social Media Scraper for Sentiment Analysis
 Scrapes posts from various social media platforms and stores them for analysis
 """
 
-import requests
-from bs4 import BeautifulSoup
+import asyncio
 from datetime import datetime
-import time
 try:
-    from .database import create_database, insert_post
+    from .database import create_database, insert_posts_bulk, get_crawl_state, update_crawl_state
+    from .scrape_engine import ScrapeEngine
+    from .http_cache import HTTPCache, HTTP_CACHE_FILE
+    from .hn_parser import parse_hacker_news, PARSERS
 except ImportError:
-    from database import create_database, insert_post
+    from database import create_database, insert_posts_bulk, get_crawl_state, update_crawl_state
+    from scrape_engine import ScrapeEngine
+    from http_cache import HTTPCache, HTTP_CACHE_FILE
+    from hn_parser import parse_hacker_news, PARSERS
+import argparse
 import logging
 import json
 
@@ -21,68 +26,186 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Reddit returns at most this many posts per listing page
+REDDIT_PAGE_SIZE = 100
+
 
 class SocialMediaScraper:
-    def __init__(self):
+    def __init__(self, reddit_base_url='https://www.reddit.com',
+                 hn_base_url='https://news.ycombinator.com',
+                 requests_per_second=1.0, max_concurrency=8, http_cache_path=HTTP_CACHE_FILE,
+                 hn_parser=None):
+        """
+        Initialize the scraper
+        
+        Args:
+            reddit_base_url: Reddit root URL (override to point at a local test server)
+            hn_base_url: Hacker News root URL (override to point at a local test server)
+            requests_per_second: Sustained request rate allowed per host
+            max_concurrency: Maximum requests in flight across all hosts
+            http_cache_path: File remembering ETag/Last-Modified validators so
+                unchanged pages are skipped (None disables conditional requests)
+            hn_parser: Hacker News page parser, 'lxml' or 'soup' (default: lxml when installed)
+        """
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
+        self.reddit_base_url = reddit_base_url.rstrip('/')
+        self.hn_base_url = hn_base_url.rstrip('/')
+        self.hn_parser = hn_parser
+        self.engine = ScrapeEngine(
+            headers=self.headers,
+            requests_per_second=requests_per_second,
+            max_concurrency=max_concurrency,
+            cache=HTTPCache(http_cache_path) if http_cache_path else None
+        )
         create_database()
     
-    def scrape_reddit_posts(self, subreddit='python', limit=50):
+    def _log_http_stats(self):
+        """Report the request counters of the scrape that just finished"""
+        stats = self.engine.stats
+        logger.info(f"HTTP: {stats['requests']} requests, {stats['not_modified']} not modified (304), "
+                    f"{stats['errors']} errors")
+    
+    def _reddit_url(self, subreddit, limit, sort='hot', after=None):
+        url = f"{self.reddit_base_url}/r/{subreddit}/{sort}.json?limit={limit}"
+        if after:
+            url += f"&after={after}"
+        return url
+    
+    def scrape_reddit_posts(self, subreddit='python', limit=50, incremental=False):
         """
         Scrape posts from Reddit (using public JSON API)
         
         Args:
             subreddit: Subreddit name
-            limit: Number of posts to fetch
+            limit: Number of posts to fetch (pages through the listing beyond 100)
+            incremental: Crawl the 'new' listing and stop at the last post seen
+                by the previous incremental crawl, instead of reading 'hot'
         """
         logger.info(f"Scraping r/{subreddit}...")
+        self.engine.reset_stats()
         
         try:
-            url = f"https://www.reddit.com/r/{subreddit}/hot.json?limit={limit}"
-            response = requests.get(url, headers=self.headers, timeout=10)
-            response.raise_for_status()
+            return len(asyncio.run(self.crawl_reddit(subreddit, limit, incremental=incremental)))
+        except Exception as e:
+            logger.error(f"Error scraping Reddit: {e}")
+            return 0
+        finally:
+            self._log_http_stats()
+    
+    async def crawl_reddit(self, subreddit, limit=50, incremental=False, progress=None):
+        """
+        Page through a subreddit listing with Reddit's `after` cursor
+        
+        In incremental mode the 'new' listing is read newest first and the
+        crawl stops at the per-subreddit high-water mark (created_utc and
+        fullname of the newest post seen last time), which is advanced once
+        the crawl finishes. `limit` still caps how far back a crawl may go;
+        a crawl that hits it before reaching the mark keeps the old mark, so
+        a later crawl with a larger limit can still fetch the posts between.
+        Storage errors propagate and leave the mark untouched.
+        
+        Args:
+            subreddit: Subreddit name
+            limit: Maximum number of posts to fetch
+            incremental: Only fetch posts newer than the high-water mark
+            progress: Optional callback progress(fetched, limit), called after
+                each listing page is stored
             
+        Returns:
+            List of new post ids
+        """
+        source = f"reddit/{subreddit.lower()}"
+        sort = 'new' if incremental else 'hot'
+        mark = get_crawl_state(source) if incremental else None
+        newest = None
+        after = None
+        fetched = 0
+        inserted_ids = []
+        reached_mark = False
+        
+        while fetched < limit:
+            url = self._reddit_url(subreddit, min(REDDIT_PAGE_SIZE, limit - fetched), sort, after)
+            response = await self.engine.fetch(url)
+            if response.status_code == 304:
+                logger.info(f"r/{subreddit} unchanged since last crawl")
+                break
             data = response.json()
-            posts = data['data']['children']
+            children = data['data']['children']
+            if not children:
+                break
             
-            count = 0
-            for post_data in posts:
-                try:
-                    post = post_data['data']
-                    
-                    # Extract post information
-                    title = post.get('title', '')
-                    selftext = post.get('selftext', '')
-                    content = f"{title}. {selftext}" if selftext else title
-                    
-                    post_id = insert_post(
-                        platform='reddit',
-                        username=post.get('author', 'unknown'),
-                        content=content,
-                        url=f"https://reddit.com{post.get('permalink', '')}",
-                        likes=post.get('score', 0),
-                        comments=post.get('num_comments', 0),
-                        post_date=datetime.fromtimestamp(post.get('created_utc', 0)).isoformat()
-                    )
-                    
-                    if post_id:
-                        count += 1
-                        logger.info(f"Inserted post: {title[:50]}...")
-                    
-                    time.sleep(0.5)  # Rate limiting
-                    
-                except Exception as e:
-                    logger.error(f"Error processing post: {e}")
-                    continue
+            page = children
+            if mark is not None:
+                last_seen_utc, last_seen_id = mark
+                for index, child in enumerate(children):
+                    post = child.get('data', {})
+                    if post.get('name') == last_seen_id or post.get('created_utc', 0) < last_seen_utc:
+                        page = children[:index]
+                        reached_mark = True
+                        break
             
-            logger.info(f"Successfully scraped {count} posts from r/{subreddit}")
-            return count
+            inserted_ids += self._store_reddit_listing(subreddit, {'data': {'children': page}})
+            self.engine.commit_validators(url, response.headers)
+            # Only posts of stored pages count towards the new mark
+            for child in page:
+                post = child.get('data', {})
+                if newest is None or post.get('created_utc', 0) > newest[0]:
+                    newest = (post.get('created_utc', 0), post.get('name'))
             
-        except Exception as e:
-            logger.error(f"Error scraping Reddit: {e}")
-            return 0
+            fetched += len(children)
+            if progress is not None:
+                progress(fetched, limit)
+            after = data['data'].get('after')
+            if reached_mark or not after:
+                break
+        
+        if incremental and newest is not None:
+            if mark is not None and not reached_mark and after and fetched >= limit:
+                logger.warning(f"r/{subreddit}: limit of {limit} posts reached before the last crawl's "
+                               f"newest post; keeping the old high-water mark, raise the limit to fill the gap")
+            else:
+                update_crawl_state(source, *newest)
+        
+        return inserted_ids
+    
+    def _store_reddit_listing(self, subreddit, data):
+        """
+        Insert the posts of a Reddit listing response in one batch, returning the new post ids
+        
+        Malformed posts are skipped; database errors propagate to the caller.
+        """
+        posts = data['data']['children']
+        
+        page = []
+        for post_data in posts:
+            try:
+                post = post_data['data']
+                
+                # Extract post information
+                title = post.get('title', '')
+                selftext = post.get('selftext', '')
+                content = f"{title}. {selftext}" if selftext else title
+                
+                page.append({
+                    'platform': 'reddit',
+                    'username': post.get('author', 'unknown'),
+                    'content': content,
+                    'url': f"https://reddit.com{post.get('permalink', '')}",
+                    'likes': post.get('score', 0),
+                    'comments': post.get('num_comments', 0),
+                    'post_date': datetime.fromtimestamp(post.get('created_utc', 0)).isoformat()
+                })
+                
+            except Exception as e:
+                logger.error(f"Error processing post: {e}")
+                continue
+        
+        inserted_ids, duplicates = insert_posts_bulk(page)
+        logger.info(f"Successfully scraped {len(inserted_ids)} posts from r/{subreddit} "
+                    f"({duplicates} already stored)")
+        return inserted_ids
     
     def scrape_hacker_news(self, limit=30):
         """
@@ -92,52 +215,41 @@ class SocialMediaScraper:
             limit: Number of posts to fetch
         """
         logger.info("Scraping Hacker News...")
+        self.engine.reset_stats()
         
         try:
-            url = "https://news.ycombinator.com"
-            response = requests.get(url, headers=self.headers, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            stories = soup.select('.athing')[:limit]
-            
-            count = 0
-            for story in stories:
-                try:
-                    title_elem = story.select_one('.titleline > a')
-                    if not title_elem:
-                        continue
-                    
-                    title = title_elem.get_text()
-                    story_url = title_elem.get('href', '')
-                    
-                    # Get the comment thread if available
-                    story_id = story.get('id')
-                    
-                    post_id = insert_post(
-                        platform='hackernews',
-                        username='HN User',
-                        content=title,
-                        url=story_url if story_url.startswith('http') else f"https://news.ycombinator.com/{story_url}",
-                        likes=0,
-                        comments=0,
-                        post_date=datetime.now().isoformat()
-                    )
-                    
-                    if post_id:
-                        count += 1
-                        logger.info(f"Inserted: {title[:50]}...")
-                    
-                except Exception as e:
-                    logger.error(f"Error processing story: {e}")
-                    continue
-            
-            logger.info(f"Successfully scraped {count} posts from Hacker News")
-            return count
-            
+            return len(asyncio.run(self._crawl_hacker_news(limit)))
         except Exception as e:
             logger.error(f"Error scraping Hacker News: {e}")
             return 0
+        finally:
+            self._log_http_stats()
+    
+    def _store_hacker_news(self, html, limit):
+        """
+        Insert the stories of a Hacker News front page in one batch, returning the new post ids
+        
+        Parser and database errors propagate to the caller.
+        """
+        stories = parse_hacker_news(html, limit=limit, parser=self.hn_parser)
+        
+        page = []
+        for story in stories:
+            story_url = story['url']
+            page.append({
+                'platform': 'hackernews',
+                'username': story['author'] or 'HN User',
+                'content': story['title'],
+                'url': story_url if story_url.startswith('http') else f"{self.hn_base_url}/{story_url}",
+                'likes': story['score'],
+                'comments': story['comments'],
+                'post_date': story['posted_at'] or datetime.now().isoformat()
+            })
+        
+        inserted_ids, duplicates = insert_posts_bulk(page)
+        logger.info(f"Successfully scraped {len(inserted_ids)} posts from Hacker News "
+                    f"({duplicates} already stored)")
+        return inserted_ids
     
     def load_sample_twitter_data(self):
         """
@@ -254,31 +366,73 @@ class SocialMediaScraper:
             }
         ]
         
-        count = 0
-        for tweet in sample_tweets:
-            try:
-                post_id = insert_post(
-                    platform='twitter',
-                    username=tweet['username'],
-                    content=tweet['content'],
-                    url=f"https://twitter.com/{tweet['username']}/status/sample",
-                    likes=tweet.get('likes', 0),
-                    shares=tweet.get('shares', 0),
-                    comments=tweet.get('comments', 0),
-                    post_date=datetime.now().isoformat()
-                )
-                
-                if post_id:
-                    count += 1
-                    logger.info(f"Inserted sample tweet from @{tweet['username']}")
-                    
-            except Exception as e:
-                logger.error(f"Error inserting sample data: {e}")
+        page = [{
+            'platform': 'twitter',
+            'username': tweet['username'],
+            'content': tweet['content'],
+            'url': f"https://twitter.com/{tweet['username']}/status/sample",
+            'likes': tweet.get('likes', 0),
+            'shares': tweet.get('shares', 0),
+            'comments': tweet.get('comments', 0),
+            'post_date': datetime.now().isoformat()
+        } for tweet in sample_tweets]
+        
+        try:
+            inserted_ids, _ = insert_posts_bulk(page)
+        except Exception as e:
+            logger.error(f"Error inserting sample data: {e}")
+            return 0
         
-        logger.info(f"Successfully loaded {count} sample tweets")
-        return count
+        logger.info(f"Successfully loaded {len(inserted_ids)} sample tweets")
+        return len(inserted_ids)
     
-    def scrape_all(self):
+    async def scrape_sources(self, subreddits=None, hn_limit=20, incremental=False):
+        """
+        Fetch several sources concurrently and store their posts
+        
+        Requests to different hosts run in parallel; requests to the same
+        host are throttled by its token bucket.
+        
+        Args:
+            subreddits: Dict of {subreddit: limit} to fetch
+            hn_limit: Number of Hacker News stories (0 to skip Hacker News)
+            incremental: Only fetch Reddit posts newer than the last crawl
+            
+        Returns:
+            Total number of new posts stored
+        """
+        subreddits = subreddits or {}
+        names = [f"r/{name}" for name in subreddits]
+        crawls = [self.crawl_reddit(name, limit, incremental=incremental)
+                  for name, limit in subreddits.items()]
+        if hn_limit:
+            names.append("Hacker News")
+            crawls.append(self._crawl_hacker_news(hn_limit))
+        
+        logger.info(f"Fetching {len(crawls)} sources concurrently...")
+        self.engine.reset_stats()
+        results = await asyncio.gather(*crawls, return_exceptions=True)
+        self._log_http_stats()
+        
+        total = 0
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error scraping {name}: {result}")
+                continue
+            total += len(result)
+        return total
+    
+    async def _crawl_hacker_news(self, limit):
+        """Fetch and store the Hacker News front page, returning the new post ids"""
+        response = await self.engine.fetch(self.hn_base_url)
+        if response.status_code == 304:
+            logger.info("Hacker News unchanged since last crawl")
+            return []
+        inserted_ids = self._store_hacker_news(response.content, limit)
+        self.engine.commit_validators(self.hn_base_url, response.headers)
+        return inserted_ids
+    
+    def scrape_all(self, incremental=False):
         """Scrape from all available sources"""
         logger.info("Starting comprehensive scraping...")
         
@@ -287,17 +441,35 @@ class SocialMediaScraper:
         # Load sample data
         total += self.load_sample_twitter_data()
         
-        # Scrape Reddit
-        total += self.scrape_reddit_posts('technology', limit=25)
-        total += self.scrape_reddit_posts('python', limit=25)
-        
-        # Scrape Hacker News
-        total += self.scrape_hacker_news(limit=20)
+        # Scrape Reddit and Hacker News concurrently
+        total += asyncio.run(self.scrape_sources(
+            subreddits={'technology': 25, 'python': 25},
+            hn_limit=20,
+            incremental=incremental
+        ))
         
         logger.info(f"Total posts scraped: {total}")
         return total
 
 
+def main():
+    parser = argparse.ArgumentParser(description="Scrape social media posts for sentiment analysis")
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help="Only fetch Reddit posts newer than the previous incremental crawl"
+    )
+    parser.add_argument(
+        '--hn-parser',
+        choices=PARSERS,
+        default=None,
+        help="Hacker News page parser (default: lxml when installed, else soup)"
+    )
+    args = parser.parse_args()
+    
+    scraper = SocialMediaScraper(hn_parser=args.hn_parser)
+    scraper.scrape_all(incremental=args.incremental)
+
+
 if __name__ == "__main__":
-    scraper = SocialMediaScraper()
-    scraper.scrape_all()
+    main()
@@ -0,0 +1,253 @@
+"""
+Transformer Inference Backends
+CPU inference options for the transformers sentiment method, all serving
+the same model:
+
+1. pytorch - the published fp32 weights (default)
+2. quantized - PyTorch dynamic int8 quantization of every Linear layer,
+   applied at load time (about 4x smaller weights, faster CPU matmuls)
+3. onnx - ONNX Runtime over an fp32 export of the model, written by
+   `python scripts/export_model.py --onnx`
+
+Loaded from a local model directory, every backend uses local_files_only
+and never touches the network.
+
+Texts are truncated by tokens, not characters, to what the model accepts:
+either keeping the start of the text ('head') or its first HEAD_TOKENS
+plus as many tokens from the end as still fit ('head_tail'), which keeps
+the conclusion of long Reddit selftexts in view.
+"""
+
+import io
+import logging
+import os
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TRANSFORMER_BACKENDS = ('pytorch', 'quantized', 'onnx')
+
+# File name of the ONNX export inside a model directory
+ONNX_FILE = 'model.onnx'
+
+TRUNCATION_STRATEGIES = ('head', 'head_tail')
+
+# Tokens kept from the start of a text under 'head_tail' truncation; the
+# rest of the window goes to its end (128 + 382 for a 512-token model)
+HEAD_TOKENS = 128
+
+# Fallback input length when the tokenizer does not declare one
+DEFAULT_MAX_LENGTH = 512
+
+
+class TransformerModel:
+    """Tokenizer, truncation and one backend's forward pass over padded batches"""
+
+    def __init__(self, model: str, backend: str = 'pytorch', local_files_only: bool = False,
+                 truncation: str = 'head'):
+        """
+        Load the tokenizer, config and model weights
+
+        Args:
+            model: Hugging Face model id, or a local directory holding a saved copy
+            backend: 'pytorch', 'quantized' or 'onnx' (requires a local directory
+                containing ONNX_FILE)
+            local_files_only: Never download, load from the directory or cache only
+            truncation: 'head' or 'head_tail', how texts longer than the model's
+                input are cut down
+        """
+        if backend not in TRANSFORMER_BACKENDS:
+            raise ValueError(f"Unknown transformers backend: {backend}. Use one of {TRANSFORMER_BACKENDS}")
+        if truncation not in TRUNCATION_STRATEGIES:
+            raise ValueError(f"Unknown truncation strategy: {truncation}. Use one of {TRUNCATION_STRATEGIES}")
+        from transformers import AutoConfig, AutoTokenizer
+
+        self.backend = backend
+        self.truncation = truncation
+        self.tokenizer = AutoTokenizer.from_pretrained(model, local_files_only=local_files_only)
+        self.config = AutoConfig.from_pretrained(model, local_files_only=local_files_only)
+        max_length = self.tokenizer.model_max_length
+        if not max_length or max_length > 100_000:
+            # Unset limits are reported as a huge sentinel value
+            max_length = DEFAULT_MAX_LENGTH
+        # Content tokens that fit next to <s> ... </s>
+        self.max_tokens = max_length - self.tokenizer.num_special_tokens_to_add(pair=False)
+        self.model = None
+        self.session = None
+
+        if backend == 'onnx':
+            import onnxruntime
+
+            self.onnx_path = Path(model) / ONNX_FILE
+            if not self.onnx_path.exists():
+                raise FileNotFoundError(
+                    f"{self.onnx_path} not found. Export it with: "
+                    f"python scripts/export_model.py --output {model} --onnx"
+                )
+            options = onnxruntime.SessionOptions()
+            options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+            self.session = onnxruntime.InferenceSession(str(self.onnx_path), options,
+                                                        providers=['CPUExecutionProvider'])
+            self._input_names = {node.name for node in self.session.get_inputs()}
+        else:
+            import torch
+            from transformers import AutoModelForSequenceClassification
+
+            self.model = AutoModelForSequenceClassification.from_pretrained(
+                model, local_files_only=local_files_only
+            )
+            self.model.eval()
+            if backend == 'quantized':
+                self.model = torch.ao.quantization.quantize_dynamic(
+                    self.model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+
+    def encode(self, texts: List[str]) -> List[List[int]]:
+        """
+        Tokenize texts and truncate each to the model's input length
+
+        Returns:
+            Token ids of each text, without special tokens
+        """
+        # verbose=False: over-long texts are expected here, they are cut below
+        ids = self.tokenizer(texts, add_special_tokens=False, verbose=False)['input_ids']
+        return [self._truncate(text_ids) for text_ids in ids]
+
+    def _truncate(self, ids: List[int]) -> List[int]:
+        if len(ids) <= self.max_tokens:
+            return ids
+        if self.truncation == 'head':
+            return ids[:self.max_tokens]
+        head = min(HEAD_TOKENS, self.max_tokens)
+        tail = self.max_tokens - head
+        return ids[:head] + (ids[-tail:] if tail else [])
+
+    def predict(self, texts: List[str]) -> List[Tuple[str, float]]:
+        """
+        Classify a batch of texts in one padded forward pass
+
+        Returns:
+            (raw_label, probability) of the most likely class for each text
+        """
+        return self.predict_encoded(self.encode(texts))
+
+    def predict_encoded(self, batch: List[List[int]]) -> List[Tuple[str, float]]:
+        """
+        Classify a batch of encode() outputs in one forward pass, padded to
+        its longest member
+
+        Returns:
+            (raw_label, probability) of the most likely class for each input
+        """
+        features = [{'input_ids': self.tokenizer.build_inputs_with_special_tokens(ids)} for ids in batch]
+        if self.session is not None:
+            encoded = self.tokenizer.pad(features, return_tensors='np')
+            inputs = {name: value.astype(np.int64) for name, value in encoded.items()
+                      if name in self._input_names}
+            logits = self.session.run(None, inputs)[0]
+            exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+            probabilities = exp / exp.sum(axis=-1, keepdims=True)
+        else:
+            import torch
+
+            encoded = self.tokenizer.pad(features, return_tensors='pt')
+            encoded = {key: value.to(self.model.device) for key, value in encoded.items()}
+            with torch.no_grad():
+                probabilities = torch.softmax(self.model(**encoded).logits, dim=-1).cpu().numpy()
+
+        indices = probabilities.argmax(axis=-1)
+        return [(self.config.id2label[int(index)], float(row[index]))
+                for row, index in zip(probabilities, indices)]
+
+    def memory_bytes(self) -> int:
+        """Size of the model weights (serialized state dict, or the ONNX file)"""
+        if self.session is not None:
+            return os.path.getsize(self.onnx_path)
+        import torch
+
+        # Quantized Linear layers keep packed weights outside parameters(),
+        # so measure what a checkpoint of the model would hold instead
+        buffer = io.BytesIO()
+        torch.save(self.model.state_dict(), buffer)
+        return buffer.tell()
+
+
+def length_batches(encoded: List[List[int]], batch_size: int) -> List[List[int]]:
+    """
+    Group encoded texts into batches of similar length
+
+    Sorting by token count before cutting batches means each batch pads to
+    a length close to all of its members, instead of every short post being
+    padded to the longest one that happened to arrive next to it.
+
+    Returns:
+        Batches of positions into encoded, shortest texts first
+    """
+    order = sorted(range(len(encoded)), key=lambda position: len(encoded[position]))
+    return [order[start:start + batch_size] for start in range(0, len(order), batch_size)]
+
+
+def save_model(model: str, output_dir, local_files_only: bool = False) -> Path:
+    """
+    Save a model's tokenizer, config and weights for offline use
+
+    Args:
+        model: Hugging Face model id (or local directory) to copy
+        output_dir: Directory to write; pass it as model_dir afterwards
+        local_files_only: Copy from the local cache without downloading
+
+    Returns:
+        The output directory
+    """
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    AutoTokenizer.from_pretrained(model, local_files_only=local_files_only).save_pretrained(output_dir)
+    AutoModelForSequenceClassification.from_pretrained(
+        model, local_files_only=local_files_only
+    ).save_pretrained(output_dir)
+    return output_dir
+
+
+def export_onnx(model_dir, opset: int = 14) -> Tuple[Path, float]:
+    """
+    Export the fp32 model saved in model_dir to model_dir/ONNX_FILE
+
+    Returns:
+        Tuple of (path of the export, largest logit difference between
+        ONNX Runtime and PyTorch on a sample batch)
+    """
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    model_dir = Path(model_dir)
+    tokenizer = AutoTokenizer.from_pretrained(model_dir, local_files_only=True)
+    model = AutoModelForSequenceClassification.from_pretrained(model_dir, local_files_only=True)
+    model.config.return_dict = False
+    model.eval()
+
+    sample = tokenizer(["Loving the new update, great work!",
+                        "The battery died after an hour and support never answered, not impressed"],
+                       padding=True, return_tensors='pt')
+    path = model_dir / ONNX_FILE
+    dynamic = {0: 'batch', 1: 'sequence'}
+    with torch.no_grad():
+        torch.onnx.export(
+            model, (sample['input_ids'], sample['attention_mask']), str(path),
+            input_names=['input_ids', 'attention_mask'], output_names=['logits'],
+            dynamic_axes={'input_ids': dynamic, 'attention_mask': dynamic, 'logits': {0: 'batch'}},
+            opset_version=opset
+        )
+        expected = model(sample['input_ids'], sample['attention_mask'])[0].numpy()
+
+    import onnxruntime
+
+    session = onnxruntime.InferenceSession(str(path), providers=['CPUExecutionProvider'])
+    actual = session.run(None, {name: sample[name].numpy() for name in ('input_ids', 'attention_mask')})[0]
+    difference = float(np.abs(actual - expected).max())
+    logger.info(f"Exported {path} (max logit difference vs PyTorch: {difference:.2e})")
+    return path, difference
@@ -0,0 +1,322 @@
+"""
+Vectorized VADER Scoring Engine
+A drop-in alternative to vaderSentiment's `polarity_scores` that scores a
+whole batch of texts at once. The batch is tokenized in one pass, every
+token is mapped to an id in a vocabulary precomputed from the VADER
+lexicon, booster words, negations and idioms, and the valence, "no",
+negation, booster, ALL-CAPS, idiom, "least" and "but" rules are applied to
+all tokens of the batch with NumPy array operations.
+
+Lexicons and constants come from the installed vaderSentiment package and
+its rules are followed exactly, quirks included, so scores match
+`polarity_scores` (checked by tests/test_vader_engine.py).
+"""
+
+import re
+import string
+from typing import Dict, List
+
+import numpy as np
+from vaderSentiment import vaderSentiment as vader
+
+# Words the rules look for by name
+_RULE_WORDS = ('no', 'or', 'nor', 'kind', 'of', 'but', 'least', 'at', 'very',
+               'never', 'so', 'this', 'without', 'doubt')
+
+# Idiom windows as token offsets from the lexicon word, in the order VADER
+# tries them: the first matching window before the word sets the valence,
+# then the windows after it override it
+_IDIOM_WINDOWS = ((-1, 0), (-2, -1, 0), (-2, -1), (-3, -2, -1), (-3, -2))
+_IDIOM_AFTER_WINDOWS = ((0, 1), (0, 1, 2))
+# Windows checked for multi-word boosters ("kind of", "sort of", ...)
+_BOOSTER_WINDOWS = ((-3, -2, -1), (-3, -2), (-2, -1))
+
+_NEGATED_SUFFIX = re.compile(r"n't")
+
+
+def _shift(values: np.ndarray, offset: int, fill) -> np.ndarray:
+    """values[i + offset] for every i, with fill where that runs off the array"""
+    shifted = np.full_like(values, fill)
+    if offset < 0:
+        shifted[-offset:] = values[:offset]
+    elif offset > 0:
+        shifted[:-offset] = values[offset:]
+    else:
+        shifted[:] = values
+    return shifted
+
+
+class VectorizedVader:
+    """VADER-compatible scorer working on token arrays of a whole batch"""
+
+    def __init__(self, analyzer=None):
+        """
+        Build the vocabulary and its per-word rule tables
+
+        Args:
+            analyzer: vaderSentiment SentimentIntensityAnalyzer whose lexicons
+                are used (default: a new one)
+        """
+        analyzer = analyzer or vader.SentimentIntensityAnalyzer()
+        lexicon = analyzer.lexicon
+
+        self.special_cases = [(key.split(), value) for key, value in vader.SPECIAL_CASES.items()
+                              if ' ' in key]
+        self.booster_phrases = [(key.split(), value) for key, value in vader.BOOSTER_DICT.items()
+                                if ' ' in key]
+
+        phrase_words = {word for words, _ in self.special_cases + self.booster_phrases for word in words}
+        # Id 0 stands for every word no rule cares about
+        words = [''] + sorted(set(lexicon) | set(vader.BOOSTER_DICT) | set(vader.NEGATE)
+                              | set(_RULE_WORDS) | phrase_words)
+        self.vocabulary = {word: i for i, word in enumerate(words)}
+
+        self.in_lexicon = np.array([word in lexicon for word in words])
+        self.valence = np.array([lexicon.get(word, 0.0) for word in words])
+        self.is_booster = np.array([word in vader.BOOSTER_DICT for word in words])
+        self.booster = np.array([vader.BOOSTER_DICT.get(word, 0.0) for word in words])
+        self.is_negation = np.array([word in vader.NEGATE for word in words])
+        self.word_id = {word: self.vocabulary[word] for word in _RULE_WORDS}
+
+        # VADER swaps single-character emojis for their descriptions; a leading
+        # space keeps them apart from the previous word, like VADER's own loop
+        self.emoji_table = {ord(char): ' ' + description
+                            for char, description in analyzer.emojis.items() if len(char) == 1}
+
+        self.special_cases = [([self.vocabulary[word] for word in phrase], value)
+                              for phrase, value in self.special_cases]
+        self.booster_phrases = [([self.vocabulary[word] for word in phrase], value)
+                                for phrase, value in self.booster_phrases]
+
+    def polarity_scores(self, text: str) -> Dict[str, float]:
+        """Score one text (same result as vaderSentiment's polarity_scores)"""
+        return self.polarity_scores_batch([text])[0]
+
+    def polarity_scores_batch(self, texts: List[str]) -> List[Dict[str, float]]:
+        """
+        Score a batch of texts
+
+        Returns:
+            One {'neg', 'neu', 'pos', 'compound'} dict per text, in order
+        """
+        if not texts:
+            return []
+        texts = [text if text.isascii() else text.translate(self.emoji_table) for text in texts]
+
+        counts = []
+        raw_tokens = []
+        for text in texts:
+            parts = text.split()
+            counts.append(len(parts))
+            raw_tokens.extend(parts)
+        counts = np.array(counts)
+
+        # Strip surrounding punctuation unless that leaves 2 characters or
+        # fewer (likely an emoticon such as ":)")
+        stripped = [token.strip(string.punctuation) for token in raw_tokens]
+        tokens = [clean if len(clean) > 2 else token for clean, token in zip(stripped, raw_tokens)]
+
+        sentiments = self._token_sentiments(tokens, counts)
+        return self._score(texts, sentiments, counts)
+
+    def _token_sentiments(self, tokens: List[str], counts: np.ndarray) -> np.ndarray:
+        """Valence of every token of the batch after all rules (0 for non-lexicon words)"""
+        n = len(tokens)
+        if n == 0:
+            return np.zeros(0)
+
+        # One C-level lowercasing of the whole batch; tokens never contain '\n'
+        joined = '\n'.join(tokens).lower()
+        lower = joined.split('\n')
+        get = self.vocabulary.get
+        ids = np.array([get(word, 0) for word in lower])
+        upper = np.fromiter(map(str.isupper, tokens), dtype=bool, count=n)
+
+        # Tokens containing "n't" count as negations
+        starts = np.zeros(n, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, lower), dtype=np.int64, count=n)[:-1] + 1, out=starts[1:])
+        has_nt = np.zeros(n, dtype=bool)
+        matches = [match.start() for match in _NEGATED_SUFFIX.finditer(joined)]
+        if matches:
+            has_nt[np.searchsorted(starts, matches, side='right') - 1] = True
+        negation = self.is_negation[ids] | has_nt
+
+        doc = np.repeat(np.arange(len(counts)), counts)
+        doc_start = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        pos = np.arange(n) - doc_start[doc]
+        length = counts[doc]
+
+        # Some but not all tokens of the text in ALL CAPS
+        caps = np.bincount(doc, weights=upper, minlength=len(counts))
+        cap_diff = ((caps > 0) & (caps < counts))[doc]
+
+        # Neighbour ids within the same text (id 0 past either end)
+        neighbours = {}
+        for offset in (-3, -2, -1, 1, 2):
+            inside = (pos + offset >= 0) & (pos + offset < length)
+            neighbours[offset] = np.where(inside, _shift(ids, offset, 0), 0)
+
+        w = self.word_id
+        active = (self.in_lexicon[ids] & ~self.is_booster[ids]
+                  & ~((ids == w['kind']) & (neighbours[1] == w['of'])))
+        at = np.flatnonzero(active)
+
+        # Everything below works on the lexicon words only
+        token = ids[at]
+        grams = {0: token}
+        for offset, values in neighbours.items():
+            grams[offset] = values[at]
+        p1, p2, p3 = grams[-1], grams[-2], grams[-3]
+        token_pos = pos[at]
+        token_caps = cap_diff[at]
+
+        base = self.valence[token]
+        v = base.copy()
+        # "no" before another lexicon word only negates it
+        v[(token == w['no']) & self.in_lexicon[grams[1]]] = 0.0
+        negated_by_no = ((p1 == w['no']) | (p2 == w['no'])
+                         | ((p3 == w['no']) & ((p1 == w['or']) | (p1 == w['nor']))))
+        v = np.where(negated_by_no, base * vader.N_SCALAR, v)
+        v = np.where(upper[at] & token_caps, np.where(v > 0, v + vader.C_INCR, v - vader.C_INCR), v)
+
+        prev_negation = [_shift(negation, -k, False)[at] for k in (1, 2, 3)]
+        prev_upper = [_shift(upper, -k, False)[at] for k in (1, 2, 3)]
+        so_or_this = [(p == w['so']) | (p == w['this']) for p in (p1, p2)]
+
+        for k, prev in enumerate((p1, p2, p3)):
+            applies = (token_pos > k) & ~self.in_lexicon[prev]
+
+            # Booster/dampener k + 1 words back, weakening with distance
+            scalar = np.where(v < 0, -self.booster[prev], self.booster[prev])
+            capped = prev_upper[k] & token_caps & self.is_booster[prev]
+            scalar = np.where(capped, np.where(v > 0, scalar + vader.C_INCR, scalar - vader.C_INCR), scalar)
+            if k == 1:
+                scalar = scalar * 0.95
+            elif k == 2:
+                scalar = scalar * 0.9
+            v = np.where(applies, v + scalar, v)
+
+            if k == 0:
+                v = np.where(applies & prev_negation[0], v * vader.N_SCALAR, v)
+            elif k == 1:
+                emphasis = (p2 == w['never']) & so_or_this[0]
+                without_doubt = (p2 == w['without']) & (p1 == w['doubt'])
+                v = np.where(applies & emphasis, v * 1.25, v)
+                v = np.where(applies & ~emphasis & ~without_doubt & prev_negation[1], v * vader.N_SCALAR, v)
+            else:
+                # As in VADER, "so"/"this" right before the word also emphasizes
+                emphasis = ((p3 == w['never']) & so_or_this[1]) | so_or_this[0]
+                without_doubt = (p3 == w['without']) & ((p2 == w['doubt']) | (p1 == w['doubt']))
+                v = np.where(applies & emphasis, v * 1.25, v)
+                v = np.where(applies & ~emphasis & ~without_doubt & prev_negation[2], v * vader.N_SCALAR, v)
+                v = np.where(applies, self._idioms(v, grams), v)
+
+        least = (p1 == w['least']) & ~self.in_lexicon[p1] & (p2 != w['at']) & (p2 != w['very'])
+        v = np.where(least, v * vader.N_SCALAR, v)
+
+        sentiments = np.zeros(n)
+        sentiments[at] = v
+        return self._but_check(sentiments, ids == w['but'], doc, pos, len(counts))
+
+    def _idioms(self, v: np.ndarray, grams: Dict[int, np.ndarray]) -> np.ndarray:
+        """Apply VADER's special-case idioms and multi-word boosters"""
+        v = v.copy()
+
+        def matches(window, phrase):
+            match = np.ones(len(v), dtype=bool)
+            for offset, word in zip(window, phrase):
+                match &= grams[offset] == word
+            return match
+
+        matched = np.zeros(len(v), dtype=bool)
+        for window in _IDIOM_WINDOWS:
+            for phrase, value in self.special_cases:
+                if len(phrase) == len(window):
+                    match = matches(window, phrase) & ~matched
+                    v[match] = value
+                    matched |= match
+        for window in _IDIOM_AFTER_WINDOWS:
+            for phrase, value in self.special_cases:
+                if len(phrase) == len(window):
+                    v[matches(window, phrase)] = value
+        for window in _BOOSTER_WINDOWS:
+            for phrase, value in self.booster_phrases:
+                if len(phrase) == len(window):
+                    match = matches(window, phrase)
+                    v[match] = v[match] + value
+        return v
+
+    @staticmethod
+    def _but_check(sentiments, is_but, doc, pos, docs) -> np.ndarray:
+        """Halve valence before the first "but" of a text and boost it by 1.5 after"""
+        but_at = np.flatnonzero(is_but)
+        if len(but_at) == 0:
+            return sentiments
+        first = but_at[np.concatenate(([True], doc[but_at][1:] != doc[but_at][:-1]))]
+        but_pos = np.full(docs, -1)
+        but_pos[doc[first]] = pos[first]
+        but_pos = but_pos[doc]
+
+        has_but = but_pos >= 0
+        before = has_but & (pos < but_pos)
+        after = has_but & (pos > but_pos)
+        shifted = np.where(before, sentiments * 0.5, np.where(after, sentiments * 1.5, sentiments))
+
+        # VADER finds each value's position with list.index(), so when a text
+        # repeats a value the first occurrence is rescaled instead; replay its
+        # loop over the nonzero values of the texts where that can happen
+        nonzero = np.flatnonzero(has_but & (sentiments != 0))
+        groups = np.split(nonzero, np.flatnonzero(np.diff(doc[nonzero])) + 1)
+        for group in groups:
+            if len(group) < 2:
+                continue
+            values = sentiments[group].tolist()
+            sides = (pos[group] - but_pos[group]).tolist()
+            current = list(values)
+            for value in values:
+                i = current.index(value)
+                if sides[i] < 0:
+                    current[i] = value * 0.5
+                elif sides[i] > 0:
+                    current[i] = value * 1.5
+            shifted[group] = current
+        return shifted
+
+    @staticmethod
+    def _score(texts: List[str], sentiments: np.ndarray, counts: np.ndarray) -> List[Dict[str, float]]:
+        """Combine token valences into VADER's compound, pos, neg and neu scores"""
+        docs = len(texts)
+        doc = np.repeat(np.arange(docs), counts)
+
+        # bincount adds in token order, like VADER's sums
+        total = np.bincount(doc, weights=sentiments, minlength=docs)
+        pos_sum = np.bincount(doc, weights=np.where(sentiments > 0, sentiments + 1, 0.0), minlength=docs)
+        neg_sum = np.bincount(doc, weights=np.where(sentiments < 0, sentiments - 1, 0.0), minlength=docs)
+        neu_count = np.bincount(doc, weights=sentiments == 0, minlength=docs)
+
+        # Emphasis from exclamation points (up to 4) and question marks (2 or more)
+        exclamations = np.minimum([text.count('!') for text in texts], 4)
+        questions = np.array([text.count('?') for text in texts])
+        emphasis = exclamations * 0.292 + np.where(
+            questions > 1, np.where(questions <= 3, questions * 0.18, 0.96), 0)
+
+        total = np.where(total > 0, total + emphasis, np.where(total < 0, total - emphasis, total))
+        compound = np.clip(total / np.sqrt(total * total + 15), -1.0, 1.0)
+
+        positive = pos_sum > np.abs(neg_sum)
+        negative = pos_sum < np.abs(neg_sum)
+        pos_sum = np.where(positive, pos_sum + emphasis, pos_sum)
+        neg_sum = np.where(negative, neg_sum - emphasis, neg_sum)
+        overall = pos_sum + np.abs(neg_sum) + neu_count
+        overall[counts == 0] = 1.0
+
+        results = []
+        for has_tokens, neg, neu, pos, score in zip(
+                (counts > 0).tolist(), np.abs(neg_sum / overall).tolist(), np.abs(neu_count / overall).tolist(),
+                np.abs(pos_sum / overall).tolist(), compound.tolist()):
+            if has_tokens:
+                results.append({'neg': round(neg, 3), 'neu': round(neu, 3),
+                                'pos': round(pos, 3), 'compound': round(score, 4)})
+            else:
+                results.append({'neg': 0.0, 'neu': 0.0, 'pos': 0.0, 'compound': 0.0})
+        return results
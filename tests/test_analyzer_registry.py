@@ -0,0 +1,65 @@
+"""
+Tests for the process-wide analyzer registry
+"""
+
+import threading
+import time
+
+from src import analyzer_registry
+from src.analyzer_registry import AnalyzerRegistry
+
+
+class SlowLock:
+    """Lock that makes the thread which built an analyzer wait before taking it again"""
+
+    def __init__(self, builder):
+        self._lock = threading.Lock()
+        self._builder = builder
+
+    def __enter__(self):
+        if threading.current_thread() is self._builder.get('thread'):
+            time.sleep(0.05)
+        self._lock.acquire()
+
+    def __exit__(self, *exc_info):
+        self._lock.release()
+
+
+def test_concurrent_first_requests_build_one_analyzer(monkeypatch):
+    builds = []
+    builder = {}
+    real_analyzer = analyzer_registry.SentimentAnalyzer
+
+    def counting_analyzer(**kwargs):
+        builds.append(kwargs)
+        builder['thread'] = threading.current_thread()
+        return real_analyzer(**kwargs)
+
+    monkeypatch.setattr(analyzer_registry, 'SentimentAnalyzer', counting_analyzer)
+    registry = AnalyzerRegistry()
+    # Widens any gap between finishing a build and registering it
+    registry._lock = SlowLock(builder)
+    start = threading.Barrier(8)
+    results = []
+
+    def request():
+        start.wait()
+        results.append(registry.get('vader'))
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(builds) == 1
+    assert len({id(analyzer) for analyzer in results}) == 1
+    assert registry.loaded()[0]['uses'] == 8
+
+
+def test_default_options_share_an_instance():
+    registry = AnalyzerRegistry()
+    assert registry.get('vader') is registry.get('vader', vader_engine='reference')
+    assert registry.get('vader') is not registry.get('vader', vader_engine='numpy')
+    assert registry.unload('vader') == 2
+    assert registry.loaded() == []
@@ -0,0 +1,65 @@
+"""
+Tests for opening the database for statistics (open_read_only)
+"""
+
+import sqlite3
+
+import pytest
+
+from src import database
+
+
+@pytest.fixture
+def db_file(tmp_path, monkeypatch):
+    path = tmp_path / 'posts.db'
+    monkeypatch.setattr(database, 'DATABASE_FILE', path)
+    monkeypatch.setattr(database, 'READ_ONLY', False)
+    yield path
+    database.close_connection()
+
+
+def test_current_database_is_read_without_the_write_lock(db_file):
+    database.create_database()
+    post_id = database.insert_post('reddit', 'u', 'great post', 'https://example.com/1')
+    database.update_post_sentiment(post_id, 0.5, 'positive')
+    database.close_connection()
+
+    assert database.open_read_only() is True
+    # A running analyzer holds the write lock; statistics must not wait for it
+    writer = sqlite3.connect(db_file, isolation_level=None)
+    writer.execute('BEGIN IMMEDIATE')
+    try:
+        assert database.get_sentiment_statistics()[0] == 1
+        with pytest.raises(sqlite3.OperationalError, match='readonly'):
+            database.get_connection().execute('DELETE FROM posts')
+    finally:
+        writer.execute('ROLLBACK')
+        writer.close()
+
+
+def test_outdated_database_is_migrated(db_file):
+    # posts as created before any migration existed
+    conn = sqlite3.connect(db_file)
+    conn.execute('''
+        CREATE TABLE posts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, platform TEXT NOT NULL, username TEXT,
+            content TEXT NOT NULL, url TEXT UNIQUE, likes INTEGER DEFAULT 0, shares INTEGER DEFAULT 0,
+            comments INTEGER DEFAULT 0, post_date TEXT, scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            sentiment_score REAL, sentiment_label TEXT, analyzed_at TIMESTAMP
+        )
+    ''')
+    conn.execute("INSERT INTO posts (platform, content, sentiment_score, sentiment_label) "
+                 "VALUES ('reddit', 'old post', -0.5, 'negative')")
+    conn.commit()
+    conn.close()
+
+    assert database.open_read_only() is False
+    assert database.get_schema_version() == database.MIGRATIONS[-1][0]
+    stats = database.get_sentiment_statistics()
+    assert stats[0] == 1 and stats[3] == 1
+
+
+def test_missing_database_is_created(db_file):
+    assert database.open_read_only() is False
+    assert db_file.exists()
+    assert database.get_sentiment_statistics()[0] == 0
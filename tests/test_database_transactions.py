@@ -0,0 +1,72 @@
+"""
+Tests for database.transaction() and what a bulk insert commits
+"""
+
+import sqlite3
+
+import pytest
+
+from src import database
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, 'DATABASE_FILE', tmp_path / 'posts.db')
+    database.create_database()
+    yield database
+    database.close_connection()
+
+
+def test_failed_begin_does_not_leave_the_thread_inside_a_transaction(db, monkeypatch):
+    monkeypatch.setattr(database, 'CONNECTION_PRAGMAS', database.CONNECTION_PRAGMAS + ('PRAGMA busy_timeout=0',))
+    database.close_connection()
+
+    # Another connection holds the write lock, so BEGIN IMMEDIATE fails at once
+    blocker = sqlite3.connect(database.DATABASE_FILE, isolation_level=None)
+    blocker.execute('BEGIN IMMEDIATE')
+    with pytest.raises(sqlite3.OperationalError, match='locked'):
+        db.insert_post('reddit', 'u', 'first try', 'https://example.com/1')
+    blocker.execute('ROLLBACK')
+    blocker.close()
+
+    post_id = db.insert_post('reddit', 'u', 'second try', 'https://example.com/2')
+    assert post_id is not None
+    assert not db.get_connection().in_transaction
+    db.close_connection()
+
+    count = db.get_connection().execute('SELECT COUNT(*) FROM posts').fetchone()[0]
+    assert count == 1
+
+
+def test_error_rolls_back_and_nested_blocks_join_the_outer_transaction(db):
+    with pytest.raises(RuntimeError):
+        with db.transaction() as conn:
+            db.insert_post('reddit', 'u', 'rolled back', 'https://example.com/1')
+            with db.transaction():
+                db.insert_post('reddit', 'u', 'nested', 'https://example.com/2')
+            raise RuntimeError('abort')
+
+    assert db.get_connection().execute('SELECT COUNT(*) FROM posts').fetchone()[0] == 0
+    assert db.insert_post('reddit', 'u', 'after', 'https://example.com/3') is not None
+
+
+def test_invalid_post_is_skipped_without_rolling_back_the_batch(db, caplog):
+    page = [
+        {'platform': 'reddit', 'content': 'first post', 'url': 'https://example.com/1'},
+        {'platform': 'reddit', 'content': None, 'url': 'https://example.com/2'},
+        {'content': 'no platform', 'url': 'https://example.com/3'},
+        {'platform': 'reddit', 'content': 'second post', 'url': 'https://example.com/4'},
+    ]
+    with caplog.at_level('WARNING'):
+        inserted_ids, duplicates = db.insert_posts_bulk(page)
+
+    assert len(inserted_ids) == 2 and duplicates == 0
+    assert 'https://example.com/2' in caplog.text and 'https://example.com/3' in caplog.text
+    urls = [url for url, in db.get_connection().execute('SELECT url FROM posts ORDER BY id')]
+    assert urls == ['https://example.com/1', 'https://example.com/4']
+
+
+def test_insert_post_returns_none_for_invalid_and_duplicate_posts(db):
+    assert db.insert_post('reddit', 'u', None, 'https://example.com/1') is None
+    assert db.insert_post('reddit', 'u', 'a post', 'https://example.com/1') is not None
+    assert db.insert_post('reddit', 'u', 'a post again', 'https://example.com/1') is None
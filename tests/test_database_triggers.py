@@ -0,0 +1,137 @@
+"""
+Tests for the trigger-maintained summary tables
+
+sentiment_stats, the hourly/daily rollups and term_frequencies are kept
+current by triggers on posts. After inserts, re-scores and deletes each must
+match what its rebuild_* function recomputes from posts.
+"""
+
+import pytest
+
+from src import database
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, 'DATABASE_FILE', tmp_path / 'posts.db')
+    database.create_database()
+    yield database
+    database.close_connection()
+
+
+POSTS = [
+    ('reddit', 'Loving the new camera, battery lasts all day'),
+    ('reddit', 'Support never answered my emails, awful service'),
+    ('reddit', 'The meeting moved to Thursday afternoon'),
+    ('hackernews', 'Show HN: a tiny database engine written in Rust'),
+    ('hackernews', 'Rust compile times are painful on large projects'),
+    ('twitter', 'Great update, the app feels fast and smooth'),
+]
+
+
+def insert_posts(db, posts=POSTS):
+    ids, _ = db.insert_posts_bulk([
+        {'platform': platform, 'content': content, 'url': f'https://example.com/{platform}/{index}'}
+        for index, (platform, content) in enumerate(posts)
+    ], dedup='keep')
+    return ids
+
+
+def summaries(db):
+    """Current contents of every trigger-maintained summary table"""
+    conn = db.get_connection()
+    return {
+        'sentiment_stats': conn.execute('SELECT * FROM sentiment_stats ORDER BY platform').fetchall(),
+        **{table: conn.execute(f'SELECT * FROM {table} ORDER BY bucket, platform, sentiment_label').fetchall()
+           for table, _ in db.ROLLUP_GRANULARITIES.values()},
+        'term_frequencies': conn.execute(
+            'SELECT * FROM term_frequencies ORDER BY platform, sentiment_label, term'
+        ).fetchall(),
+    }
+
+
+def rebuilt(db):
+    db.rebuild_sentiment_stats()
+    db.rebuild_sentiment_rollups()
+    db.rebuild_term_frequencies()
+    return summaries(db)
+
+
+def assert_matches_rebuild(db, tables=None):
+    """Trigger-maintained state equals a rebuild from posts (floats up to rounding drift)"""
+    maintained = summaries(db)
+    expected = rebuilt(db)
+    assert maintained.keys() == expected.keys()
+    for table in tables or expected:
+        assert len(maintained[table]) == len(expected[table]), table
+        for got, want in zip(maintained[table], expected[table]):
+            assert got == pytest.approx(want), table
+
+
+def test_insert_and_score(db):
+    ids = insert_posts(db)
+    assert_matches_rebuild(db)
+
+    db.update_post_sentiments_bulk([
+        (ids[0], 0.8, 'positive'), (ids[1], -0.7, 'negative'), (ids[2], 0.0, 'neutral'),
+        (ids[3], 0.3, 'positive'), (ids[4], -0.4, 'negative'), (ids[5], 0.9, 'positive'),
+    ])
+    assert_matches_rebuild(db)
+    stats = db.get_sentiment_statistics()
+    assert stats[0] == len(POSTS)
+
+
+def test_rescore_moves_posts_between_labels(db):
+    ids = insert_posts(db)
+    db.update_post_sentiments_bulk([(post_id, 0.5, 'positive') for post_id in ids])
+    db.update_post_sentiments_bulk([(ids[1], -0.6, 'negative'), (ids[4], 0.0, 'neutral')])
+    assert_matches_rebuild(db)
+
+
+def test_linked_near_duplicates_follow_their_canonical_post(db):
+    ids = insert_posts(db)
+    db.update_post_sentiments_bulk([(ids[0], 0.8, 'positive')])
+    duplicate_ids, _ = db.insert_posts_bulk([{
+        'platform': 'reddit', 'content': 'Loving the new camera, battery lasts all day!!',
+        'url': 'https://example.com/reddit/repost'
+    }])
+    assert_matches_rebuild(db)
+
+    db.update_post_sentiments_bulk([(ids[0], -0.2, 'negative')])
+    label = db.get_connection().execute(
+        'SELECT sentiment_label FROM posts WHERE id = ?', (duplicate_ids[0],)
+    ).fetchone()[0]
+    assert label == 'negative'
+    assert_matches_rebuild(db)
+
+
+def test_scraped_at_change_moves_rollup_bucket(db):
+    ids = insert_posts(db)
+    db.update_post_sentiments_bulk([(post_id, 0.5, 'positive') for post_id in ids])
+    with db.transaction() as conn:
+        conn.execute("UPDATE posts SET scraped_at = '2024-01-02 03:04:05' WHERE id = ?", (ids[0],))
+    assert_matches_rebuild(db)
+
+
+def test_delete_updates_stats_and_rollups_immediately(db):
+    ids = insert_posts(db)
+    db.update_post_sentiments_bulk([(post_id, 0.5, 'positive') for post_id in ids])
+    with db.transaction() as conn:
+        conn.execute('DELETE FROM posts WHERE id IN (?, ?)', (ids[0], ids[3]))
+    assert_matches_rebuild(db, ['sentiment_stats'] + [table for table, _ in db.ROLLUP_GRANULARITIES.values()])
+
+
+def test_delete_leaves_term_frequencies_stale_until_next_drain(db):
+    ids = insert_posts(db)
+    db.update_post_sentiments_bulk([(post_id, 0.5, 'positive') for post_id in ids])
+    assert 'camera' in db.get_term_frequencies()
+
+    # Raw deletes only queue the removal; the words stay counted ...
+    with db.transaction() as conn:
+        conn.execute('DELETE FROM posts WHERE id = ?', (ids[0],))
+    assert 'camera' in db.get_term_frequencies()
+
+    # ... until the next write that drains the queue
+    db.update_post_sentiments_bulk([(ids[1], -0.5, 'negative')])
+    assert 'camera' not in db.get_term_frequencies()
+    assert_matches_rebuild(db)
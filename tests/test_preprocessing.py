@@ -0,0 +1,33 @@
+"""
+Tests for the single-pass text preprocessor
+
+fixtures/preprocess_reference.jsonl pairs each text with the output of the
+original multi-pass preprocessor (re.sub for URLs, mentions and '#', then
+whitespace collapsing): hand-picked edge cases, random strings dense in
+'@', '#', 'http' and 'www', and social-media-like posts.
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from src.sentiment_analyzer import preprocess_batch, preprocess_text
+
+REFERENCE = [json.loads(line) for line in
+             (Path(__file__).parent / 'fixtures' / 'preprocess_reference.jsonl').open(encoding='utf-8')]
+
+
+def test_preprocess_text_matches_reference():
+    mismatches = [case for case in REFERENCE if preprocess_text(case['text']) != case['expected']]
+    assert mismatches == []
+
+
+def test_preprocess_batch_matches_reference():
+    assert preprocess_batch([case['text'] for case in REFERENCE]) == [case['expected'] for case in REFERENCE]
+
+
+@pytest.mark.parametrize('text', [None, ''])
+def test_empty_text(text):
+    assert preprocess_text(text) == ''
+    assert preprocess_batch([text]) == ['']
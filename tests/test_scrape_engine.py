@@ -0,0 +1,47 @@
+"""
+Tests for ScrapeEngine's concurrency limit
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('requests')
+from src.scrape_engine import ScrapeEngine  # noqa: E402
+
+
+class FakeResponse:
+    status_code = 200
+
+
+def test_fetch_keeps_at_most_max_concurrency_requests_in_flight():
+    engine = ScrapeEngine(requests_per_second=1000, burst=100, max_concurrency=3)
+    lock = threading.Lock()
+    in_flight = 0
+    peak = 0
+
+    def slow_get(url, headers):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.05)
+        with lock:
+            in_flight -= 1
+        return FakeResponse()
+
+    engine._get = slow_get
+
+    async def scrape():
+        # Callers such as SocialMediaScraper gather fetch() directly
+        return await asyncio.gather(*(engine.fetch(f'https://example.com/{i}') for i in range(12)))
+
+    # The limit holds on every event loop the engine is used from
+    for _ in range(2):
+        peak = 0
+        responses = asyncio.run(scrape())
+        assert len(responses) == 12
+        assert peak == 3
+    assert engine.stats['requests'] == 24
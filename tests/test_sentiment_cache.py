@@ -0,0 +1,42 @@
+"""
+Tests for SentimentCache after close()
+"""
+
+import threading
+
+from src.sentiment_cache import SentimentCache, make_cache_key
+
+RESULT = {'label': 'positive', 'score': 0.5}
+
+
+def test_closed_cache_misses_and_ignores_puts(tmp_path):
+    cache = SentimentCache(db_path=tmp_path / 'cache.db')
+    key = make_cache_key('vader', 'v1', 'great post')
+    cache.put(key, RESULT)
+    assert cache.get(key) == RESULT
+
+    cache.close()
+    assert cache.get(key) is None
+    cache.put(make_cache_key('vader', 'v1', 'another post'), RESULT)
+    assert cache.get(make_cache_key('vader', 'v1', 'another post')) is None
+    assert cache.stats()['memory_size'] == 0
+    cache.close()
+
+    # What was stored before closing is still on disk
+    reopened = SentimentCache(db_path=tmp_path / 'cache.db')
+    assert reopened.get(key) == RESULT
+    reopened.close()
+
+
+def test_close_waits_for_a_running_lookup(tmp_path):
+    cache = SentimentCache(db_path=tmp_path / 'cache.db')
+
+    # A get/put in another thread holds the lock while it uses the connection
+    with cache._lock:
+        closer = threading.Thread(target=cache.close)
+        closer.start()
+        closer.join(timeout=0.2)
+        assert closer.is_alive()
+        cache._conn.execute('SELECT 1 FROM sentiment_cache').fetchall()
+    closer.join()
+    assert cache._conn is None
@@ -0,0 +1,168 @@
+"""
+Tests for the transformers inference backends
+
+The feed and label-mapping tests use stand-in tokenizer/session objects and
+always run. The end-to-end tests build a tiny random RoBERTa model offline,
+export it to ONNX and compare every backend with fp32 PyTorch; they are
+skipped unless transformers, torch and onnxruntime are installed.
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from src.transformer_backends import TransformerModel, length_batches
+
+ID2LABEL = {0: 'negative', 1: 'neutral', 2: 'positive'}
+
+
+class FakeTokenizer:
+    """Adds <s>/</s> (ids 0 and 2) and pads with 1 like RoBERTa's tokenizer"""
+
+    def build_inputs_with_special_tokens(self, ids):
+        return [0] + list(ids) + [2]
+
+    def pad(self, features, return_tensors=None):
+        width = max(len(feature['input_ids']) for feature in features)
+        input_ids = [feature['input_ids'] + [1] * (width - len(feature['input_ids'])) for feature in features]
+        mask = [[1] * len(feature['input_ids']) + [0] * (width - len(feature['input_ids'])) for feature in features]
+        # int32 and an input the graph does not declare, as some tokenizers return
+        return {'input_ids': np.array(input_ids, dtype=np.int32),
+                'attention_mask': np.array(mask, dtype=np.int32),
+                'token_type_ids': np.zeros((len(features), width), dtype=np.int32)}
+
+
+class FakeSession:
+    """ONNX Runtime session stand-in returning fixed logits per row"""
+
+    def __init__(self, logits):
+        self.logits = np.array(logits, dtype=np.float32)
+        self.feeds = []
+
+    def get_inputs(self):
+        return [type('Input', (), {'name': name})() for name in ('input_ids', 'attention_mask')]
+
+    def run(self, output_names, feed):
+        self.feeds.append(feed)
+        return [self.logits[:len(feed['input_ids'])]]
+
+
+def make_onnx_model(logits):
+    model = TransformerModel.__new__(TransformerModel)
+    model.tokenizer = FakeTokenizer()
+    model.config = type('Config', (), {'id2label': ID2LABEL})()
+    model.model = None
+    model.session = FakeSession(logits)
+    model._input_names = {node.name for node in model.session.get_inputs()}
+    return model
+
+
+def test_onnx_feed_matches_graph_inputs():
+    model = make_onnx_model([[0.0, 0.0, 1.0], [2.0, 0.0, 0.0]])
+    model.predict_encoded([[5, 6, 7], [8]])
+
+    feed = model.session.feeds[0]
+    assert set(feed) == {'input_ids', 'attention_mask'}
+    assert all(value.dtype == np.int64 for value in feed.values())
+    assert feed['input_ids'].tolist() == [[0, 5, 6, 7, 2], [0, 8, 2, 1, 1]]
+    assert feed['attention_mask'].tolist() == [[1, 1, 1, 1, 1], [1, 1, 1, 0, 0]]
+
+
+def test_onnx_predictions_use_id2label_and_softmax():
+    logits = [[0.0, 0.0, 3.0], [3.0, 0.0, 0.0], [0.0, 1.0, 0.0]]
+    model = make_onnx_model(logits)
+    predictions = model.predict_encoded([[5], [6], [7]])
+
+    assert [label for label, _ in predictions] == ['positive', 'negative', 'neutral']
+    expected = np.exp(3.0) / (np.exp(3.0) + 2)
+    assert predictions[0][1] == pytest.approx(expected)
+    assert predictions[2][1] == pytest.approx(np.e / (np.e + 2))
+
+
+def test_head_tail_truncation_keeps_both_ends(monkeypatch):
+    monkeypatch.setattr('src.transformer_backends.HEAD_TOKENS', 3)
+    model = TransformerModel.__new__(TransformerModel)
+    model.max_tokens = 8
+    model.truncation = 'head_tail'
+    assert model._truncate(list(range(20))) == [0, 1, 2, 15, 16, 17, 18, 19]
+    model.truncation = 'head'
+    assert model._truncate(list(range(20))) == list(range(8))
+    assert model._truncate([1, 2]) == [1, 2]
+
+
+def test_length_batches_groups_similar_lengths():
+    encoded = [[0] * length for length in (5, 40, 3, 12, 3, 80, 7)]
+    batches = length_batches(encoded, 3)
+    assert batches == [[2, 4, 0], [6, 3, 1], [5]]
+    assert sorted(position for batch in batches for position in batch) == list(range(len(encoded)))
+
+
+# ==================== END TO END ====================
+
+@pytest.fixture(scope='module')
+def tiny_model_dir(tmp_path_factory):
+    """A randomly initialized 1-layer RoBERTa classifier with a byte-level tokenizer, saved offline"""
+    pytest.importorskip('torch')
+    transformers = pytest.importorskip('transformers')
+    from transformers.models.roberta.tokenization_roberta import bytes_to_unicode
+
+    directory = tmp_path_factory.mktemp('tiny-roberta')
+    vocab = {token: index for index, token in enumerate(['<s>', '<pad>', '</s>', '<unk>'])}
+    for char in bytes_to_unicode().values():
+        vocab.setdefault(char, len(vocab))
+    (directory / 'vocab.json').write_text(json.dumps(vocab))
+    (directory / 'merges.txt').write_text('#version: 0.2\n')
+
+    tokenizer = transformers.RobertaTokenizerFast(
+        vocab_file=str(directory / 'vocab.json'), merges_file=str(directory / 'merges.txt'),
+        model_max_length=64
+    )
+    tokenizer.save_pretrained(directory)
+
+    config = transformers.RobertaConfig(
+        vocab_size=len(vocab), hidden_size=32, num_hidden_layers=1, num_attention_heads=2,
+        intermediate_size=64, max_position_embeddings=66, pad_token_id=1, bos_token_id=0,
+        eos_token_id=2, num_labels=3, id2label=ID2LABEL, label2id={v: k for k, v in ID2LABEL.items()}
+    )
+    transformers.RobertaForSequenceClassification(config).save_pretrained(directory)
+    return directory
+
+
+TEXTS = ['great', 'this phone is terrible and support never answers', 'ok ' * 40, 'meh']
+
+
+def test_pytorch_backend_labels_come_from_id2label(tiny_model_dir):
+    model = TransformerModel(str(tiny_model_dir), local_files_only=True)
+    encoded = model.encode(TEXTS)
+    assert max(len(ids) for ids in encoded) == model.max_tokens == 62
+
+    predictions = model.predict_encoded(encoded)
+    assert len(predictions) == len(TEXTS)
+    for label, probability in predictions:
+        assert label in ID2LABEL.values()
+        assert 1 / 3 <= probability <= 1
+
+
+def test_onnx_export_matches_pytorch(tiny_model_dir):
+    pytest.importorskip('onnxruntime')
+    from src.transformer_backends import export_onnx
+
+    _, difference = export_onnx(tiny_model_dir)
+    assert difference < 1e-4
+
+    reference = TransformerModel(str(tiny_model_dir), local_files_only=True)
+    onnx = TransformerModel(str(tiny_model_dir), backend='onnx', local_files_only=True)
+    # Batches of different lengths exercise the dynamic batch/sequence axes
+    for batch in (TEXTS, TEXTS[:1], TEXTS[1:3]):
+        expected = reference.predict(batch)
+        actual = onnx.predict(batch)
+        assert [label for label, _ in actual] == [label for label, _ in expected]
+        assert [p for _, p in actual] == pytest.approx([p for _, p in expected], abs=1e-4)
+
+
+def test_quantized_backend_runs(tiny_model_dir):
+    quantized = TransformerModel(str(tiny_model_dir), backend='quantized', local_files_only=True)
+    predictions = quantized.predict(TEXTS)
+    assert [label in ID2LABEL.values() for label, _ in predictions] == [True] * len(TEXTS)
+    assert quantized.memory_bytes() > 0
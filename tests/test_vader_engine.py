@@ -0,0 +1,41 @@
+"""
+Tests for the vectorized VADER engine
+
+Scores for fixtures/vader_reference.jsonl must match vaderSentiment's
+polarity_scores: its demo sentences (one per rule), random posts dense in
+lexicon, booster, negation, idiom and emoji tokens, and preprocessed
+social-media-like posts.
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+vader = pytest.importorskip('vaderSentiment.vaderSentiment')
+from src.vader_engine import VectorizedVader  # noqa: E402
+
+TEXTS = [json.loads(line)['text'] for line in
+         (Path(__file__).parent / 'fixtures' / 'vader_reference.jsonl').open(encoding='utf-8')]
+
+
+@pytest.fixture(scope='module')
+def reference():
+    return vader.SentimentIntensityAnalyzer()
+
+
+def test_batch_scores_match_vader(reference):
+    engine = VectorizedVader(reference)
+    actual = engine.polarity_scores_batch(TEXTS)
+    mismatches = [(text, want, got) for text, want, got
+                  in zip(TEXTS, (reference.polarity_scores(text) for text in TEXTS), actual)
+                  if any(abs(want[key] - got[key]) > 1e-4 for key in want)]
+    assert mismatches == []
+
+
+def test_batch_size_does_not_change_scores(reference):
+    engine = VectorizedVader(reference)
+    whole = engine.polarity_scores_batch(TEXTS)
+    chunked = [scores for start in range(0, len(TEXTS), 7)
+               for scores in engine.polarity_scores_batch(TEXTS[start:start + 7])]
+    assert chunked == whole